@@ -0,0 +1,67 @@
+"""Closed-form amortization schedules.
+
+Every function broadcasts over principal, annual rate (in percent) and number
+of monthly payments, so one call can produce the schedules for a whole grid
+of loans. Month ``k`` of a schedule is computed directly from the closed
+form rather than by stepping through the months:
+
+    balance_k = P * (1 + r)**k - EMI * ((1 + r)**k - 1) / r
+
+with ``balance_k = P - EMI * k`` when the rate is zero.
+"""
+import numpy as np
+
+import scoring
+
+
+def _monthly_rate(annual_rate):
+    return np.asarray(annual_rate, dtype=float) / (12 * 100)
+
+
+def balance_after(principal, annual_rate, n_payments, k):
+    """Outstanding balance after ``k`` payments (``k`` broadcasts too)."""
+    principal = np.asarray(principal, dtype=float)
+    r = _monthly_rate(annual_rate)
+    k = np.asarray(k, dtype=float)
+    payment = scoring.emi(principal, annual_rate, n_payments)
+
+    growth = np.power(1 + r, k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        balance = np.where(r == 0, principal - payment * k, principal * growth - payment * (growth - 1) / r)
+    # Clip the float dust around the final payment
+    return np.clip(balance, 0, None)
+
+
+def total_interest(principal, annual_rate, n_payments):
+    """Interest paid over the whole loan."""
+    return scoring.emi(principal, annual_rate, n_payments) * np.asarray(n_payments) - np.asarray(principal)
+
+
+def schedule(principal, annual_rate, n_payments):
+    """Month-by-month breakdown of one or many loans.
+
+    Returns a dict with ``months`` (1..longest term) and ``payment``,
+    ``interest``, ``principal`` and ``balance`` arrays shaped
+    ``broadcast(principal, annual_rate, n_payments).shape + (len(months),)``.
+    Months past a loan's own term are zero.
+    """
+    principal, annual_rate, n_payments = np.broadcast_arrays(
+        np.asarray(principal, dtype=float), np.asarray(annual_rate, dtype=float), np.asarray(n_payments))
+    months = np.arange(1, int(n_payments.max()) + 1)
+
+    r = _monthly_rate(annual_rate)[..., None]
+    payment = np.asarray(scoring.emi(principal, annual_rate, n_payments))[..., None]
+    active = months <= n_payments[..., None]
+
+    balance = np.where(active, balance_after(principal[..., None], annual_rate[..., None],
+                                             n_payments[..., None], months), 0.0)
+    opening = np.concatenate([principal[..., None], balance[..., :-1]], axis=-1)
+    interest = np.where(active, opening * r, 0.0)
+
+    return {
+        "months": months,
+        "payment": np.where(active, payment, 0.0),
+        "interest": interest,
+        "principal": np.where(active, payment - interest, 0.0),
+        "balance": balance,
+    }
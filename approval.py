@@ -0,0 +1,206 @@
+"""Approval model: logistic regression trained on past loan decisions.
+
+The Loan Predictor's heuristic (``scoring.approval_chance``) only looks at
+the credit score. This model learns approval odds from a CSV of historical
+decisions with the columns ``income``, ``credit_score``, ``age``,
+``employment_status``, ``loan_type`` and ``approved`` (0/1), using plain
+NumPy (Newton's method with L2 regularization).
+
+The trained model is a few kilobytes of arrays saved as an ``.npz``
+artifact (``approval_model.npz`` by default, or ``LOAN_APPROVAL_MODEL``).
+The app reloads it whenever the file changes, so a retrained model goes
+live without restarting the server; without an artifact the app keeps the
+heuristic.
+
+    python approval.py synthesize history.csv --rows 100000   # demo data
+    python approval.py train history.csv                      # writes approval_model.npz
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+import scoring
+
+MODEL_PATH = os.environ.get("LOAN_APPROVAL_MODEL", "approval_model.npz")
+NUMERIC = ["income", "credit_score", "age"]
+CATEGORIES = {"employment_status": list(scoring.EMPLOYMENT_MAP), "loan_type": list(scoring.LOAN_TYPE_MAP)}
+TARGET = "approved"
+L2 = 1e-3
+
+
+def _column(applicants, name):
+    return np.asarray(applicants[name])
+
+
+class ApprovalModel:
+    """Standardized numeric features plus one-hot categories, logistic link."""
+
+    def __init__(self, weights, bias, mean, scale, info=None):
+        self.weights = np.asarray(weights, dtype=float)
+        self.bias = float(bias)
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.info = info or {}
+
+    def predict(self, applicants):
+        """Approval chance in percent for a DataFrame or mapping of arrays (or scalars)."""
+        logit = features(applicants, self.mean, self.scale) @ self.weights + self.bias
+        chance = 100 / (1 + np.exp(-logit))
+        return chance.item() if chance.ndim == 0 else chance
+
+    def save(self, path=MODEL_PATH):
+        """Write the artifact atomically, so a running app never loads half a file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(suffix=".npz", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, weights=self.weights, bias=self.bias, mean=self.mean, scale=self.scale,
+                     info=json.dumps({**self.info, "numeric": NUMERIC, "categories": CATEGORIES}))
+        os.replace(tmp, path)
+
+
+def features(applicants, mean, scale):
+    """Design matrix ``(..., n_features)``: standardized ``NUMERIC`` then one-hot ``CATEGORIES``.
+
+    A category label the model does not know raises ValueError, as in ``scoring.factor``.
+    """
+    numeric = [(_column(applicants, name).astype(float) - m) / s for name, m, s in zip(NUMERIC, mean, scale)]
+    one_hot = []
+    for name, labels in CATEGORIES.items():
+        values = _column(applicants, name)
+        masks = [values == label for label in labels]
+        known = np.logical_or.reduce(masks)
+        if not known.all():
+            raise ValueError(f"Unknown {name}: {values[~known][0]!r}")
+        one_hot.extend(mask.astype(float) for mask in masks)
+    return np.stack(np.broadcast_arrays(*numeric, *one_hot), axis=-1)
+
+
+def train(history, l2=L2, iterations=25, holdout=0.2, seed=0):
+    """Fit an ``ApprovalModel`` on a DataFrame of past decisions; metrics go in ``info``."""
+    y = _column(history, TARGET).astype(float)
+    mean = np.array([_column(history, name).astype(float).mean() for name in NUMERIC])
+    scale = np.array([_column(history, name).astype(float).std() or 1.0 for name in NUMERIC])
+    X = features(history, mean, scale)
+    X = np.hstack([X, np.ones((len(X), 1))])  # bias column
+
+    test = np.random.default_rng(seed).random(len(X)) < holdout
+    X_train, y_train = X[~test], y[~test]
+
+    w = np.zeros(X.shape[1])
+    penalty = l2 * len(X_train) * np.eye(X.shape[1])
+    penalty[-1, -1] = 0  # bias is not regularized
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-(X_train @ w)))
+        gradient = X_train.T @ (p - y_train) + penalty @ w
+        hessian = (X_train * (p * (1 - p))[:, None]).T @ X_train + penalty
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.abs(step).max() < 1e-8:
+            break
+
+    p_test = 1 / (1 + np.exp(-(X[test] @ w)))
+    info = {
+        "trained_rows": int((~test).sum()),
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "test_accuracy": float(((p_test > 0.5) == y[test]).mean()) if test.any() else None,
+        "test_auc": _auc(y[test], p_test) if test.any() else None,
+    }
+    return ApprovalModel(w[:-1], w[-1], mean, scale, info)
+
+
+def _auc(y, p):
+    """Area under the ROC curve from the rank-sum statistic."""
+    ranks = np.empty(len(p))
+    ranks[np.argsort(p)] = np.arange(1, len(p) + 1)
+    positives = y.sum()
+    negatives = len(y) - positives
+    if positives == 0 or negatives == 0:
+        return None
+    return float((ranks[y == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def load(path=MODEL_PATH):
+    """Read an artifact; anything that is not a usable model raises ValueError."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            info = json.loads(str(data["info"]))
+            model = ApprovalModel(data["weights"], data["bias"], data["mean"], data["scale"], info)
+    except (KeyError, EOFError, zipfile.BadZipFile) as e:
+        raise ValueError(f"{path} is not an approval model: {e}") from e
+    if info.get("numeric") != NUMERIC or info.get("categories") != CATEGORIES:
+        raise ValueError(f"{path} was trained on different features")
+    return model
+
+
+def artifact_mtime(path=MODEL_PATH):
+    """Modification time of the artifact (the app's reload key), or None if there is none."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def synthesize_history(rows, seed=0):
+    """Made-up past decisions for trying the model out; not real lending data."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    history = pd.DataFrame({
+        "income": rng.integers(1000, 20001, rows),
+        "credit_score": rng.integers(300, 851, rows),
+        "age": rng.integers(18, 71, rows),
+        "employment_status": rng.choice(list(scoring.EMPLOYMENT_MAP), rows, p=[0.7, 0.2, 0.1]),
+        "loan_type": rng.choice(list(scoring.LOAN_TYPE_MAP), rows),
+    })
+    logit = (
+        (history["credit_score"] - 650) / 40
+        + np.log(history["income"] / 5000)
+        - ((history["age"] - 40) / 20) ** 2
+        + history["employment_status"].map({"Employed": 0.8, "Self-Employed": 0.2, "Unemployed": -1.5})
+        + history["loan_type"].map({"Home Loan": 0.5, "Car Loan": 0.2, "Education Loan": 0.3, "Personal Loan": -0.6})
+    )
+    history[TARGET] = (rng.random(rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the loan approval model.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_cmd = commands.add_parser("train", help="fit the model on a CSV of past decisions")
+    train_cmd.add_argument("history", help="CSV with the feature columns and 'approved'")
+    train_cmd.add_argument("--output", default=MODEL_PATH, help=f"artifact path (default {MODEL_PATH})")
+    train_cmd.add_argument("--l2", type=float, default=L2)
+
+    synth_cmd = commands.add_parser("synthesize", help="write a made-up history CSV for demos")
+    synth_cmd.add_argument("output")
+    synth_cmd.add_argument("--rows", type=int, default=100_000)
+    synth_cmd.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "synthesize":
+        synthesize_history(args.rows, args.seed).to_csv(args.output, index=False)
+        print(f"Wrote {args.rows:,} synthetic decisions to {args.output}", file=sys.stderr)
+        return 0
+
+    import pandas as pd
+
+    start = time.perf_counter()
+    model = train(pd.read_csv(args.history), l2=args.l2)
+    model.save(args.output)
+    info = model.info
+    accuracy, auc = (f"{info[k]:.3f}" if info[k] is not None else "n/a" for k in ("test_accuracy", "test_auc"))
+    print(f"Trained on {info['trained_rows']:,} rows in {time.perf_counter() - start:.2f}s: "
+          f"accuracy {accuracy}, AUC {auc} on the holdout; "
+          f"saved {os.path.getsize(args.output):,} bytes to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
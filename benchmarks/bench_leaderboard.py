@@ -0,0 +1,87 @@
+"""Leaderboard view latency as the results store grows.
+
+Fills a temporary ``leaderboard.ResultStore`` with synthetic game results
+in batches and, at every checkpoint, times what a page load runs: both
+top-N boards and the cohort table. With the indexes and the incremental
+aggregates the view time should stay flat from thousands to millions of
+games; the insert rate shows what the triggers cost.
+
+    python benchmarks/bench_leaderboard.py --games 1000000
+"""
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import game  # noqa: E402
+import game_engine  # noqa: E402
+import leaderboard  # noqa: E402
+
+BATCH_SIZE = 50_000
+
+
+def synthetic_results(rng, n):
+    """Result rows with roughly the game's spread of outcomes."""
+    growth = rng.lognormal(5.3, 0.6, n) - 100
+    luck = rng.normal(0, 40, n)
+    return zip(
+        (uuid.UUID(int=int(i)).hex for i in rng.integers(0, 2 ** 63, n, dtype=np.int64)),
+        itertools.repeat(game_engine.classic().fingerprint, n),
+        np.full(n, time.time()).tolist(),
+        (game.STARTING_MONEY * (1 + growth / 100)).tolist(),
+        growth.tolist(),
+        rng.uniform(0, 100, n).tolist(),
+        rng.choice(len(game.PERSONALITIES), n, p=[0.1, 0.1, 0.2, 0.6]).tolist(),
+        luck.tolist(),
+        (growth - luck).tolist(),
+    )
+
+
+def time_view(store, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for by in leaderboard.BOARDS:
+            store.top(by)
+        store.cohorts()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    checkpoints = sorted({n for n in (1_000, 10_000, 100_000, 1_000_000, 10_000_000) if n < args.games}
+                         | {args.games})
+    rng = np.random.default_rng(args.seed)
+    print(f"{'games':>12} {'insert/s':>10} {'view p50':>10} {'view max':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = leaderboard.ResultStore(os.path.join(tmp, "results.db"))
+        stored = 0
+        for checkpoint in checkpoints:
+            before, start = stored, time.perf_counter()
+            while stored < checkpoint:
+                stored += store.record_many(synthetic_results(rng, min(BATCH_SIZE, checkpoint - stored)))
+            insert_rate = (stored - before) / (time.perf_counter() - start)
+            samples = time_view(store, args.repeat)
+            print(f"{len(store):12,} {insert_rate:10,.0f} "
+                  f"{statistics.median(samples):8.2f}ms {max(samples):8.2f}ms")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
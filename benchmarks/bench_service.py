@@ -0,0 +1,119 @@
+"""Load generator for the scoring service (``service.py``).
+
+Starts the service with uvicorn in a subprocess (or targets ``--url``),
+then, for every concurrency level, keeps that many keep-alive connections
+busy posting single-applicant ``/score`` requests for ``--duration``
+seconds and reports p50/p99 latency and requests per second. Running it
+for several batch sizes shows what micro-batching buys (1 = no batching):
+
+    python benchmarks/bench_service.py --concurrency 1,8,32,128 --max-batch 1,256
+
+The client is a minimal HTTP/1.1 client on asyncio streams, so the
+numbers do not include a client library's overhead.
+"""
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+
+APPLICANT = {"income": 5000, "credit_score": 720, "employment_status": "Employed",
+             "loan_type": "Home Loan", "loan_term": 20}
+
+
+def _request(host, path, body):
+    return (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+async def _worker(host, port, path, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    request = _request(host, path, json.dumps(APPLICANT).encode())
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = next(int(line.split(b":")[1]) for line in headers.split(b"\r\n")
+                          if line.lower().startswith(b"content-length"))
+            await reader.readexactly(length)
+            if not headers.startswith(b"HTTP/1.1 200"):
+                errors.append(headers.split(b"\r\n")[0])
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def load(url, concurrency, duration):
+    """Latencies (s), errors and elapsed time of ``concurrency`` busy connections."""
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker(parts.hostname, parts.port, parts.path or "/score", start + duration,
+                                   latencies, errors) for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(max_batch, window_ms):
+    port = _free_port()
+    process = subprocess.Popen([sys.executable, str(ROOT / "service.py"), "--port", str(port),
+                                "--max-batch", str(max_batch), "--window-ms", str(window_ms)], cwd=ROOT)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, f"http://127.0.0.1:{port}/score"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("the service did not start")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the scoring service.")
+    parser.add_argument("--url", help="score against a running service instead of starting one")
+    parser.add_argument("--concurrency", default="1,8,32,128", help="comma-separated connection counts")
+    parser.add_argument("--max-batch", default="256", help="comma-separated batch limits to start with")
+    parser.add_argument("--window-ms", type=float, default=0.0, help="batching window of the started service")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per level")
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    batch_limits = [None] if args.url else [int(b) for b in args.max_batch.split(",")]
+
+    print(f"{'batch':>6} {'conns':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for max_batch in batch_limits:
+        process = None
+        url = args.url
+        if url is None:
+            process, url = start_service(max_batch, args.window_ms)
+        try:
+            for concurrency in levels:
+                latencies, errors, elapsed = asyncio.run(load(url, concurrency, args.duration))
+                p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+                label = "-" if max_batch is None else str(max_batch)
+                print(f"{label:>6} {concurrency:6} {len(latencies) / elapsed:9,.0f} {p50:8.2f} {p99:8.2f} "
+                      f"{len(errors):7}")
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Load test for Financial Journey Game sessions.
+
+Simulates thousands of concurrent players: every session starts a game and
+plays it month by month, with all sessions interleaved across a thread pool
+the way Streamlit interleaves script runs. Reports per-session memory of the
+compact ``game_engine.GameState`` against the old ``game_data`` dict of lists, the
+on-disk size per game in SQLite, and step latency/throughput of each store.
+
+    python benchmarks/bench_sessions.py --sessions 5000 --threads 8
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import game  # noqa: E402
+import game_engine  # noqa: E402
+import sessions  # noqa: E402
+
+
+def legacy_game_data(choices, events):
+    """The ``st.session_state.game_data`` dict the game used to keep."""
+    data = {"month": 0, "money": [game.STARTING_MONEY], "events": [], "choices": [],
+            "investment_amount": 0, "savings_amount": game.STARTING_MONEY, "loan_amount": 0, "loan_emi": 0}
+    for choice, event in zip(choices, events):
+        data["month"] += 1
+        data["money"].append(float(random.random() * 1e5))
+        # Event names and choices came back from widgets and random.choices as fresh strings
+        data["events"].append("".join(event))
+        data["choices"].append("".join(choice))
+    return data
+
+
+def measure(build, n):
+    """Bytes allocated per object by ``build()``, averaged over ``n`` objects."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build() for _ in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / n
+
+
+def random_move(rng):
+    decision = rng.choice(game.CHOICES)
+    event = rng.choices(game.EVENT_NAMES, weights=game.EVENT_PROBABILITIES)[0]
+    return decision, rng.randint(10, 100), event
+
+
+def run_load(store, n_sessions, threads, seed=0):
+    """Play ``n_sessions`` full games concurrently; returns step latencies in ms."""
+    game_ids = [uuid.uuid4().hex for _ in range(n_sessions)]
+    for game_id in game_ids:
+        store.put(game_id, game_engine.GameState())
+
+    def step(args):
+        game_id, move_seed = args
+        start = time.perf_counter()
+        state = store.get(game_id)
+        state.play_month(*random_move(random.Random(move_seed)))
+        store.put(game_id, state)
+        return (time.perf_counter() - start) * 1000
+
+    latencies = []
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for month in range(game.MONTHS):
+            # Every session plays its next month before anyone plays the one after
+            work = [(game_id, hash((seed, month, i))) for i, game_id in enumerate(game_ids)]
+            latencies.extend(pool.map(step, work))
+    return latencies
+
+
+def report(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"  {name:<16} {len(latencies) / elapsed:10,.0f} steps/s   "
+          f"p50 {statistics.median(latencies):6.3f} ms   p99 {p99:6.3f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for game session stores.")
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    moves = [random_move(rng) for _ in range(game.MONTHS)]
+    choices = [m[0] for m in moves]
+    events = [m[2] for m in moves]
+
+    def compact():
+        state = game_engine.GameState()
+        for decision, pct, event in moves:
+            state.play_month(decision, pct, event)
+        return state
+
+    print(f"Per-session memory after {game.MONTHS} months:")
+    print(f"  legacy dict      {measure(lambda: legacy_game_data(choices, events), 2000):8,.0f} bytes")
+    print(f"  GameState        {measure(compact, 2000):8,.0f} bytes")
+    print(f"  serialized       {len(compact().to_bytes()):8,} bytes")
+
+    print(f"\n{args.sessions:,} concurrent sessions x {game.MONTHS} months on {args.threads} threads:")
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "memory": sessions.open_store("memory", max_sessions=args.sessions),
+            "sqlite": sessions.open_store(f"sqlite:{os.path.join(tmp, 'a.db')}"),
+            "memory+sqlite": sessions.open_store(f"memory+sqlite:{os.path.join(tmp, 'b.db')}",
+                                                 max_sessions=args.sessions // 2),
+        }
+        for name, store in stores.items():
+            start = time.perf_counter()
+            latencies = run_load(store, args.sessions, args.threads)
+            report(name, latencies, time.perf_counter() - start)
+
+        db_size = os.path.getsize(os.path.join(tmp, "a.db"))
+        print(f"\n  sqlite file      {db_size / args.sessions:8,.0f} bytes per game")
+        evicted = stores["memory+sqlite"].evictions
+        print(f"  memory+sqlite    {evicted:,} evictions spilled to disk")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
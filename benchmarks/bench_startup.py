@@ -0,0 +1,145 @@
+"""Cold-start benchmark for loan.py.
+
+Measures, each in a fresh interpreter:
+
+- import time: ``python -X importtime loan.py`` in Streamlit's bare mode,
+  summed over top-level imports, plus which heavy libraries got loaded;
+- time to first render: the first ``AppTest`` run of the script;
+- time to the first prediction: the rerun after clicking Predict, which pays
+  for the libraries deferred out of the cold start.
+
+The medians are checked against ``startup_budget.json`` and the script exits
+with status 1 when any of them regresses past the budget, or when a library
+that should load lazily shows up at cold start.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --update-budget
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "loan.py"
+BUDGET_FILE = Path(__file__).resolve().parent / "startup_budget.json"
+BUDGET_HEADROOM = 1.5
+
+# Reported when loaded at cold start; the budget file lists the ones that fail
+# the check (Streamlit imports a light plotly stub itself, so plotly is only
+# reported)
+HEAVY_MODULES = ["matplotlib", "seaborn", "plotly", "pandas", "pyarrow"]
+
+RENDER_SNIPPET = """
+import json, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+at.sidebar.button[0].click()
+start = time.perf_counter()
+at.run()
+predict = time.perf_counter() - start
+print(json.dumps({{"first_render_ms": first * 1000, "predict_render_ms": predict * 1000,
+                  "errors": len(at.exception)}}))
+"""
+
+
+def parse_importtime(stderr):
+    """(total top-level import time in ms, set of imported module names)."""
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        modules.add(name.strip())
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def measure_imports():
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(APP)],
+                          cwd=ROOT, capture_output=True, text=True)
+    return parse_importtime(proc.stderr)
+
+
+def measure_render():
+    proc = subprocess.run([sys.executable, "-c", RENDER_SNIPPET.format(app=str(APP))],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"AppTest run failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(runs):
+    import_ms, first_ms, predict_ms = [], [], []
+    loaded = set()
+    for _ in range(runs):
+        total, modules = measure_imports()
+        import_ms.append(total)
+        loaded |= {m for m in HEAVY_MODULES if m in modules}
+
+        render = measure_render()
+        if render["errors"]:
+            raise RuntimeError("loan.py raised during the AppTest run")
+        first_ms.append(render["first_render_ms"])
+        predict_ms.append(render["predict_render_ms"])
+
+    return {
+        "import_ms": statistics.median(import_ms),
+        "first_render_ms": statistics.median(first_ms),
+        "predict_render_ms": statistics.median(predict_ms),
+        "cold_start_modules": sorted(loaded),
+    }
+
+
+def check(result, budget):
+    """List of budget violations (empty when within budget)."""
+    failures = []
+    for key in ("import_ms", "first_render_ms", "predict_render_ms"):
+        if result[key] > budget[key]:
+            failures.append(f"{key}: {result[key]:.0f} ms > budget {budget[key]:.0f} ms")
+    for module in result["cold_start_modules"]:
+        if module in budget["lazy_modules"]:
+            failures.append(f"{module} is imported at cold start but should load lazily")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for loan.py.")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per measurement (median is used)")
+    parser.add_argument("--update-budget", action="store_true",
+                        help=f"write the measured times x{BUDGET_HEADROOM} as the new budget")
+    args = parser.parse_args(argv)
+
+    result = run(args.runs)
+    print(f"import time        {result['import_ms']:8.0f} ms")
+    print(f"first render       {result['first_render_ms']:8.0f} ms")
+    print(f"first prediction   {result['predict_render_ms']:8.0f} ms")
+    print(f"heavy modules at cold start: {', '.join(result['cold_start_modules']) or 'none'}")
+
+    budget = json.loads(BUDGET_FILE.read_text())
+    if args.update_budget:
+        for key in ("import_ms", "first_render_ms", "predict_render_ms"):
+            budget[key] = round(result[key] * BUDGET_HEADROOM)
+        BUDGET_FILE.write_text(json.dumps(budget, indent=2) + "\n")
+        print(f"Budget written to {BUDGET_FILE.name}")
+        return 0
+
+    failures = check(result, budget)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("Cold start within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
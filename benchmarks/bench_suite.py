@@ -0,0 +1,478 @@
+"""Benchmark suite for the hot paths of loan.py.
+
+Times each hot path in isolation (eligibility formula, heatmap build, term
+sweep, EMI, one game month, end-of-game summary) and full scripted reruns
+of each tab through Streamlit's headless ``AppTest`` harness. Results are
+written as JSON and compared against a stored baseline; the script exits
+with status 1 when any benchmark is slower than the baseline by more than
+the tolerance. The comparison uses the best round of each benchmark, which
+is far less sensitive to a busy machine than the median.
+
+    python benchmarks/bench_suite.py                    # run and compare
+    python benchmarks/bench_suite.py --save-baseline    # accept current numbers
+    python benchmarks/bench_suite.py --only game --repeat 20
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+import charts  # noqa: E402
+import game  # noqa: E402
+import game_engine  # noqa: E402
+import scoring  # noqa: E402
+
+APP = ROOT / "loan.py"
+RESULTS_FILE = HERE / "results.json"
+BASELINE_FILE = HERE / "baseline.json"
+DEFAULT_TOLERANCE = 0.25  # 25% slower than the baseline fails
+RERUN_TOLERANCE = 0.5     # full AppTest reruns are noisier than the hot paths
+
+BENCHMARKS = {}
+
+
+def benchmark(name, tolerance=None):
+    """Register ``func(repeat)``, which returns a list of per-call times in seconds.
+
+    ``tolerance`` overrides the allowed slowdown for this benchmark.
+    """
+    def register(func):
+        func.tolerance = tolerance
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def time_calls(func, repeat, number=None):
+    """Per-call time of ``func`` over ``repeat`` rounds of ``number`` calls."""
+    func()  # warm-up: imports, caches and font loading stay out of the samples
+    if number is None:
+        # Enough calls per round for the round to take ~100ms
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - start > 0.1:
+                break
+            number *= 10
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+def sample_applicants(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "income": rng.integers(1000, 20001, n),
+        "credit_score": rng.integers(300, 851, n),
+        "employment_status": rng.choice(list(scoring.EMPLOYMENT_MAP), n),
+        "loan_type": rng.choice(list(scoring.LOAN_TYPE_MAP), n),
+        "loan_term": rng.choice(scoring.LOAN_TERMS, n),
+        "interest": rng.uniform(5, 15, n),
+    }
+
+
+# ----- Hot Paths -----
+@benchmark("eligibility.scalar")
+def bench_eligibility_scalar(repeat):
+    return time_calls(lambda: scoring.loan_amount(5000, 650, 1, 1.2, 10), repeat)
+
+
+@benchmark("eligibility.batch_1m")
+def bench_eligibility_batch(repeat):
+    applicants = sample_applicants(1_000_000)
+    return time_calls(lambda: scoring.score(applicants), repeat, number=1)
+
+
+@contextmanager
+def _score_table():
+    """A freshly built table, memory-mapped from a directory that lives as long as the block."""
+    import score_table
+
+    with tempfile.TemporaryDirectory() as tmp:
+        yield score_table.load(score_table.build(f"{tmp}/score_table.npy"))
+
+
+# Lookup vs formula on the same on-grid applicants (default interest)
+@benchmark("score_table.scalar")
+def bench_score_table_scalar(repeat):
+    with _score_table() as table:
+        return time_calls(lambda: table.loan_amount(5000, 650, "Employed", "Home Loan", 10), repeat)
+
+
+@benchmark("score_table.lookup_1m")
+def bench_score_table_lookup(repeat):
+    applicants = sample_applicants(1_000_000)
+    del applicants["interest"]
+    with _score_table() as table:
+        return time_calls(lambda: table.score(applicants), repeat, number=1)
+
+
+@benchmark("score_table.formula_1m")
+def bench_score_table_formula(repeat):
+    applicants = sample_applicants(1_000_000)
+    del applicants["interest"]
+    return time_calls(lambda: scoring.score(applicants), repeat, number=1)
+
+
+@benchmark("genie.batch_100k")
+def bench_genie_batch(repeat):
+    import genie
+
+    catalogue = genie.load()
+    applicants = sample_applicants(100_000)
+    rng = np.random.default_rng(1)
+    occupations = rng.choice(genie.OCCUPATIONS, 100_000)
+    ages = rng.integers(18, 71, 100_000)
+    return time_calls(lambda: catalogue.lookup(occupations, applicants["loan_type"], ages,
+                                               applicants["income"], applicants["credit_score"]), repeat)
+
+
+@benchmark("approval_model.batch_10k")
+def bench_approval_model(repeat):
+    import approval
+
+    model = approval.train(approval.synthesize_history(20_000))
+    history = approval.synthesize_history(10_000, seed=1)
+    applicants = {name: history[name].to_numpy() for name in history.columns}
+    return time_calls(lambda: model.predict(applicants), repeat)
+
+
+@benchmark("heatmap.data")
+def bench_heatmap_data(repeat):
+    # __wrapped__ skips the LRU cache so the build itself is timed
+    return time_calls(lambda: charts.heatmap_data.__wrapped__(0.8, 1.2, 10), repeat)
+
+
+@benchmark("heatmap.png")
+def bench_heatmap_png(repeat):
+    return time_calls(lambda: charts.heatmap_png.__wrapped__(0.8, 1.2, 10), repeat, number=1)
+
+
+@benchmark("term_sweep.data")
+def bench_term_sweep(repeat):
+    return time_calls(lambda: charts.term_sweep.__wrapped__(50000, 5000, 8.0, 20), repeat)
+
+
+@benchmark("emi.scalar")
+def bench_emi_scalar(repeat):
+    return time_calls(lambda: scoring.emi(50000, 8.0, 240), repeat)
+
+
+@benchmark("emi.grid_30y_1000_rates")
+def bench_emi_grid(repeat):
+    import amortization
+
+    rates = np.linspace(5, 15, 1000)
+    return time_calls(lambda: amortization.schedule(200000, rates, 360), repeat)
+
+
+@benchmark("game.month_step")
+def bench_game_step(repeat):
+    moves = [("Invest", 20, game.EVENT_NAMES[0]), ("Save", 0, game.EVENT_NAMES[1]),
+             ("Borrow", 0, game.EVENT_NAMES[2])]
+
+    def play():
+        state = game_engine.GameState()
+        for month in range(game.MONTHS):
+            state.play_month(*moves[month % len(moves)])
+
+    # One call plays a whole game; report the cost of a single month
+    return [t / game.MONTHS for t in time_calls(play, repeat)]
+
+
+@benchmark("game_engine.step_100k_120m")
+def bench_engine_step(repeat):
+    """One month of 100,000 random games under the 10-year ``game_rules.json``."""
+    rules = game_engine.load(ROOT / "game_rules.json")
+    rng = np.random.default_rng(5)
+    n_games = 100_000
+    events = rules.draw_events(rng, n_games)
+    choices = rng.integers(len(rules.choices), size=(rules.months, n_games))
+
+    def play():
+        portfolio = game_engine.Portfolios(rules, n_games)
+        for month in range(rules.months):
+            portfolio.step(choices[month], 20, events[month])
+
+    return [t / rules.months for t in time_calls(play, repeat, number=1)]
+
+
+@benchmark("game.summary_figures")
+def bench_game_summary(repeat):
+    """Building a finished game's summary screen: numbers, journey table and both charts."""
+    import game_summary
+
+    state = game_engine.GameState()
+    for month in range(game.MONTHS):
+        state.play_month(game.CHOICES[month % 3], 20, game.EVENT_NAMES[month % 4])
+
+    def build():
+        summary = game_summary.Summary(state)
+        summary.chart("decisions", client_side=False)
+        summary.chart("growth", client_side=False)
+
+    return time_calls(build, repeat, number=1)
+
+
+@benchmark("game_log.append")
+def bench_game_log_append(repeat):
+    """What a "Proceed to Next Month" click pays for logging its month."""
+    import uuid
+
+    import game_log
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = game_log.LogWriter(str(Path(tmp) / "game_log.bin"))
+        game_id = uuid.uuid4().hex
+        try:
+            return time_calls(lambda: log.append(game_id, 12345, 7, game.INVEST, 20, 3), repeat)
+        finally:
+            log.close()
+
+
+@benchmark("game_log.replay_all_10k")
+def bench_game_log_replay_all(repeat):
+    import game_log
+
+    n_games = 10_000
+    rng = np.random.default_rng(3)
+    records = np.zeros(n_games * game.MONTHS, dtype=game_log.RECORD)
+    game_keys = np.array([i.to_bytes(16, "big") for i in range(1, n_games + 1)], dtype="S16")
+    records["game"] = np.repeat(game_keys, game.MONTHS)
+    records["seed"] = np.repeat(rng.integers(0, 2 ** 62, n_games, dtype=np.uint64), game.MONTHS)
+    records["rules"] = game_engine.classic().fingerprint
+    records["month"] = np.tile(np.arange(game.MONTHS), n_games)
+    records["choice"] = rng.integers(len(game.CHOICES), size=len(records))
+    records["invest"] = np.where(records["choice"] == game.INVEST, 20, 0)
+    records["event"] = game.event_codes(records["seed"], records["month"])
+    return time_calls(lambda: game_log.replay_all(records), repeat)
+
+
+@benchmark("stress.loans_10k")
+def bench_stress_loans(repeat):
+    """10,000 loans x 50 market paths x 36 months."""
+    import stress
+
+    book = stress.synthesize_book(10_000, seed=4)
+    income_paths, rate_paths = stress.market_paths(stress.DEFAULT_PATHS, stress.DEFAULT_MONTHS, seed=4)
+    return time_calls(lambda: stress.stress_loans(book["loan_amount"], book["interest"], book["loan_term"],
+                                                  book["income"], income_paths, rate_paths), repeat)
+
+
+# ----- Full Reruns (AppTest) -----
+@contextmanager
+def _app_files(directory):
+    """Point the files the app writes (game log, results) into ``directory`` for the block."""
+    files = {"LOAN_GAME_LOG": "game_log.bin", "LOAN_RESULTS_DB": "results.db"}
+    saved = {name: os.environ.get(name) for name in files}
+    os.environ.update({name: os.path.join(directory, filename) for name, filename in files.items()})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                del os.environ[name]
+            else:
+                os.environ[name] = value
+
+
+def _app():
+    from streamlit import config, logger
+    from streamlit.testing.v1 import AppTest
+
+    # Keep deprecation chatter out of the report
+    config.set_option("logger.level", "error")
+    logger.set_log_level("error")
+
+    return AppTest.from_file(str(APP), default_timeout=120)
+
+
+def _button(at, label):
+    return next(b for b in at.button if label in b.label)
+
+
+def _timed_runs(at, repeat, before=None):
+    samples = []
+    for i in range(repeat):
+        if before is not None:
+            before(at, i)
+        start = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(f"loan.py raised: {at.exception[0].message}")
+    return samples
+
+
+@benchmark("rerun.predictor_slider", tolerance=RERUN_TOLERANCE)
+def bench_rerun_predictor(repeat):
+    at = _app().run()
+    at.sidebar.button[0].click().run()
+    rates = [8.0, 9.0]
+
+    def move_slider(at, i):
+        at.slider(key="sim_interest").set_value(rates[i % 2])
+
+    return _timed_runs(at, repeat, move_slider)
+
+
+@benchmark("rerun.predictor_cold", tolerance=RERUN_TOLERANCE)
+def bench_rerun_predictor_cold(repeat):
+    """A predictor rerun with every chart cache empty: all five PNGs are built (see ``render.prefetch``)."""
+    at = _app().run()
+    at.sidebar.button[0].click().run()
+    return _timed_runs(at, repeat, lambda at, i: charts.cache_clear())
+
+
+@benchmark("rerun.simulator_fragment", tolerance=RERUN_TOLERANCE)
+def bench_rerun_simulator_fragment(repeat):
+    """The same slider move as ``rerun.predictor_slider``, rerunning only the simulator fragment.
+
+    AppTest always reruns the whole script, so the fragment id is passed
+    along with the widget states the way the server does when a widget
+    inside a fragment changes.
+    """
+    from unittest import mock
+
+    from streamlit.testing.v1 import local_script_runner
+
+    at = _app().run()
+    at.sidebar.button[0].click().run()
+    fragment_ids = list(at._fragment_storage._fragments)
+    if len(fragment_ids) != 1:
+        raise RuntimeError(f"expected one fragment on the predictor tab, found {len(fragment_ids)}")
+
+    def rerun_data(**kwargs):
+        return local_script_runner_rerun_data(fragment_id_queue=fragment_ids, **kwargs)
+
+    local_script_runner_rerun_data = local_script_runner.RerunData
+    rates = [8.0, 9.0]
+    samples = []
+    with mock.patch.object(local_script_runner, "RerunData", rerun_data):
+        for i in range(repeat):
+            at.slider(key="sim_interest").set_value(rates[i % 2])
+            start = time.perf_counter()
+            at.run()
+            samples.append(time.perf_counter() - start)
+            if at.exception:
+                raise RuntimeError(f"loan.py raised: {at.exception[0].message}")
+    return samples
+
+
+@benchmark("rerun.game_month", tolerance=RERUN_TOLERANCE)
+def bench_rerun_game(repeat):
+    at = _app().run()
+    _button(at, "Start New Game").click().run()
+
+    def proceed(at, i):
+        if not any("Proceed" in b.label for b in at.button):
+            _button(at, "Play Again").click().run()
+        _button(at, "Proceed").click()
+
+    return _timed_runs(at, repeat, proceed)
+
+
+@benchmark("rerun.game_summary", tolerance=RERUN_TOLERANCE)
+def bench_rerun_summary(repeat):
+    at = _app().run()
+    _button(at, "Start New Game").click().run()
+    for _ in range(game.MONTHS):
+        _button(at, "Proceed").click().run()
+    return _timed_runs(at, repeat)
+
+
+# ----- Runner -----
+def run(names, repeat):
+    results = {}
+    for name in names:
+        samples = BENCHMARKS[name](repeat)
+        results[name] = {
+            "median_ms": statistics.median(samples) * 1000,
+            "min_ms": min(samples) * 1000,
+            "samples": len(samples),
+        }
+        print(f"  {name:<28} {results[name]['median_ms']:12.4f} ms  (min {results[name]['min_ms']:.4f})")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Names of the benchmarks slower than ``baseline`` by more than ``tolerance``."""
+    regressions = []
+    print(f"\n  {'benchmark':<28} {'baseline':>12} {'now':>12} {'ratio':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["min_ms"]
+        ratio = result["min_ms"] / before if before else float("inf")
+        allowed = BENCHMARKS[name].tolerance or tolerance
+        flag = "  REGRESSION" if ratio > 1 + allowed else ""
+        print(f"  {name:<28} {before:12.4f} {result['min_ms']:12.4f} {ratio:7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of loan.py.")
+    parser.add_argument("--only", help="run the benchmarks whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=7, help="timed rounds per benchmark")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline (0.25 = 25%%); "
+                             "full reruns use RERUN_TOLERANCE")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    names = [n for n in BENCHMARKS if not args.only or args.only in n]
+    # The scripted games must not land in the working copy's game log and leaderboard
+    with tempfile.TemporaryDirectory() as tmp, _app_files(tmp):
+        results = run(names, args.repeat)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps({**report, "results": baseline}, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline.name}")
+        return 0
+
+    if not args.baseline.exists():
+        print("\nNo baseline yet; run with --save-baseline to create one")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text())["results"], args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,441 @@
+"""Chart data, images and Plotly figures for loan.py.
+
+Streamlit reruns the whole script on every widget change, so the heatmap and
+the term sweep are cached here by their real inputs and only rebuilt when
+those change. Each cache is a bounded LRU; ``cache_stats()`` exposes the
+hit/miss counters.
+
+Server-side images are built on ``matplotlib.figure.Figure`` directly rather
+than through pyplot, so nothing is registered globally and rendering is safe
+from Streamlit's script threads. The ``*_figure`` functions build the Plotly
+equivalents used by the client-side rendering mode (see ``render``).
+"""
+import io
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, wraps
+
+import numpy as np
+
+import amortization
+import scoring
+import sensitivity
+
+CACHE_SIZE = 64
+MAX_DPI = 200
+MAX_IMAGE_WIDTH = 1460  # px, Streamlit's widest image before it resizes server-side
+RENDER_PROCESSES = int(os.environ.get("LOAN_RENDER_PROCESSES", "0"))
+
+_DRAWERS = {}  # name -> function building the Figure, so worker processes can find it
+_pool = None
+_pool_lock = threading.Lock()
+_figures = weakref.WeakSet()  # Figures built in this process and not yet garbage collected
+
+# Heatmap axes: monthly income down the rows, credit score across
+HEATMAP_INCOMES = np.arange(1000, 20001, 1000)
+HEATMAP_SCORES = np.arange(300, 851, 50)
+
+
+def _png(fig):
+    # st.image re-encodes anything wider than it can display on every call,
+    # so the resolution is capped to keep cached images within that width
+    _figures.add(fig)
+    dpi = min(MAX_DPI, MAX_IMAGE_WIDTH / (fig.get_figwidth() + 0.5))
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=dpi)
+    return buf.getvalue()
+
+
+def _draw_png(name, args):
+    return _png(_DRAWERS[name](*args))
+
+
+def resident_figures():
+    """Number of matplotlib figures built in this process that are still in memory."""
+    return len(_figures)
+
+
+def _rasterized(draw):
+    """Turn a function building a Figure into one returning its PNG bytes.
+
+    With ``RENDER_PROCESSES`` > 0 the figure is built and rasterized in a
+    worker process. Matplotlib holds the GIL for most of that work, so
+    threads alone cannot render several charts at once.
+    """
+    _DRAWERS[draw.__name__] = draw
+
+    @wraps(draw)
+    def render(*args):
+        if RENDER_PROCESSES <= 0:
+            return _png(draw(*args))
+        return _process_pool().submit(_draw_png, draw.__name__, args).result()
+    return render
+
+
+def _process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a multi-threaded Streamlit server is unsafe
+            _pool = ProcessPoolExecutor(RENDER_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+@lru_cache(maxsize=None)
+def preload():
+    """Import the plotting libraries the PNG builders import lazily.
+
+    Call from the script thread before building PNGs in worker threads: a
+    library half-imported by a worker is visible, incomplete, to the script.
+    """
+    import matplotlib.figure
+    import pandas
+    import seaborn
+
+
+def _frozen(array):
+    array.setflags(write=False)
+    return array
+
+
+# ----- Heatmap -----
+@lru_cache(maxsize=CACHE_SIZE)
+def heatmap_data(employment_factor, loan_type_factor, loan_term):
+    """Predicted loan amount for every (income, credit score) cell."""
+    return _frozen(scoring.loan_amount(HEATMAP_INCOMES[:, None], HEATMAP_SCORES[None, :],
+                                       employment_factor, loan_type_factor, loan_term))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+@_rasterized
+def heatmap_png(employment_factor, loan_type_factor, loan_term):
+    """The seaborn heatmap rendered to PNG bytes."""
+    import pandas as pd
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    df_heat = pd.DataFrame(heatmap_data(employment_factor, loan_type_factor, loan_term),
+                           index=HEATMAP_INCOMES, columns=HEATMAP_SCORES)
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    sns.heatmap(df_heat, cmap="YlGnBu", ax=ax, cbar_kws={'label': 'Loan Amount ($)'}, linewidths=0.5)
+    ax.set_title("Credit Score vs Income vs Predicted Loan Amount")
+    ax.set_xlabel("Credit Score")
+    ax.set_ylabel("Monthly Income ($)")
+    return fig
+
+
+# ----- Term Sweep -----
+@lru_cache(maxsize=CACHE_SIZE)
+def term_sweep(sim_loan_amount, sim_income, sim_interest, sim_duration):
+    """EMI, debt-to-income, total interest and net savings for terms of 1 year up to the selected term + 5 (max 30)."""
+    max_term = min(sim_duration + 5, 30)
+    terms = np.arange(1, max_term + 1)
+    emis = scoring.emi(sim_loan_amount, sim_interest, terms * 12)
+    return {
+        "terms": _frozen(terms),
+        "emis": _frozen(emis),
+        "ratios": _frozen(scoring.debt_to_income(emis, sim_income)),
+        "interest": _frozen(amortization.total_interest(sim_loan_amount, sim_interest, terms * 12)),
+        "savings": _frozen((sim_income - emis) * terms * 12),
+    }
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+@_rasterized
+def term_sweep_png(sim_loan_amount, sim_income, sim_interest, sim_duration):
+    """Debt-to-income ratio against loan term, rendered to PNG bytes."""
+    from matplotlib.figure import Figure
+
+    sweep = term_sweep(sim_loan_amount, sim_income, sim_interest, sim_duration)
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.plot(sweep["terms"], sweep["ratios"], marker='o', color='orange', label="Debt-to-Income Ratio (%)")
+    ax.axvline(sim_duration, color='red', linestyle='--', label=f"Selected Term ({sim_duration} yrs)")
+    ax.set_xlabel("Loan Term (Years)")
+    ax.set_ylabel("Debt-to-Income Ratio (%)")
+    ax.set_title("📉 Financial Impact of Loan Duration")
+    ax.grid(True)
+    ax.legend()
+    return fig
+
+
+# ----- Amortization -----
+@lru_cache(maxsize=CACHE_SIZE)
+def amortization_schedule(sim_loan_amount, sim_interest, sim_duration):
+    """Month-by-month interest, principal and balance of the simulated loan."""
+    return {name: _frozen(values) for name, values in
+            amortization.schedule(sim_loan_amount, sim_interest, sim_duration * 12).items()}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+@_rasterized
+def amortization_png(sim_loan_amount, sim_interest, sim_duration):
+    """Interest/principal split of every EMI with the outstanding balance, rendered to PNG bytes."""
+    from matplotlib.figure import Figure
+
+    schedule = amortization_schedule(sim_loan_amount, sim_interest, sim_duration)
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.stackplot(schedule["months"], schedule["interest"], schedule["principal"],
+                 labels=["Interest", "Principal"], colors=['#ff9999', '#66b3ff'])
+    ax.set_xlabel("Months")
+    ax.set_ylabel("Monthly EMI ($)")
+    ax.legend(loc="upper left")
+
+    balance_ax = ax.twinx()
+    balance_ax.plot(schedule["months"], schedule["balance"], color='black', label="Outstanding Balance")
+    balance_ax.set_ylabel("Outstanding Balance ($)")
+    balance_ax.legend(loc="upper right")
+    ax.set_title("Amortization Schedule")
+    return fig
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+@_rasterized
+def savings_png(sim_loan_amount, sim_income, sim_interest, sim_duration):
+    """Cumulative net savings and the monthly EMI over the loan, rendered to PNG bytes."""
+    from matplotlib.figure import Figure
+
+    schedule = amortization_schedule(sim_loan_amount, sim_interest, sim_duration)
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.plot(schedule["months"], np.cumsum(sim_income - schedule["payment"]), label="Net Savings Over Time",
+            color='green')
+    ax.plot(schedule["months"], schedule["payment"], label="Monthly EMI", linestyle='--', color='red')
+    ax.set_xlabel("Months")
+    ax.set_ylabel("Amount ($)")
+    ax.set_title("Financial Simulation Over Loan Period")
+    ax.legend()
+    return fig
+
+
+# ----- Affordability Surface -----
+@lru_cache(maxsize=CACHE_SIZE)
+def dti_surface(sim_income):
+    """Debt-to-income ratio over sensitivity.AMOUNTS x TERMS x RATES for one income."""
+    return _frozen(sensitivity.dti_surface(sim_income))
+
+
+def _affordability_slice(sim_income, sim_interest):
+    rate_index = sensitivity.nearest_rate_index(sim_interest)
+    return dti_surface(sim_income)[:, :, rate_index], sensitivity.RATES[rate_index]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+@_rasterized
+def affordability_png(sim_income, sim_interest, sim_duration, sim_loan_amount):
+    """DTI contour map over loan amount and term at the selected rate, rendered to PNG bytes."""
+    from matplotlib.figure import Figure
+
+    ratios, rate = _affordability_slice(sim_income, sim_interest)
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    filled = ax.contourf(sensitivity.TERMS, sensitivity.AMOUNTS, np.minimum(ratios, 100),
+                         levels=np.arange(0, 101, 10), cmap="RdYlGn_r")
+    fig.colorbar(filled, ax=ax, label="Debt-to-Income Ratio (%)")
+    lines = ax.contour(sensitivity.TERMS, sensitivity.AMOUNTS, ratios,
+                       levels=[scoring.COMFORTABLE_DTI, scoring.HIGH_DTI], colors='black', linewidths=1.5)
+    ax.clabel(lines, fmt="%d%%")
+    ax.plot(sim_duration, sim_loan_amount, marker='o', color='blue', markersize=8)
+    ax.set_xlabel("Loan Term (Years)")
+    ax.set_ylabel("Loan Amount ($)")
+    ax.set_title(f"Affordability at {rate:.1f}% Interest")
+    return fig
+
+
+# ----- Game Summary -----
+# Months shaded on the net-worth chart, by a word in the market event's name
+EVENT_BAND_COLORS = {"Bull Run": "green", "Recession": "red"}
+PIE_COLORS = ['#ff9999', '#66b3ff', '#99ff99']
+
+
+def _pie_slices(decision_counts):
+    """Labels, counts and colours of the choices actually made (the classic colours for three choices)."""
+    made = [(i, label, count) for i, (label, count) in enumerate(decision_counts.items()) if count]
+    colors = [PIE_COLORS[i] for i, _, _ in made] if len(decision_counts) <= len(PIE_COLORS) else None
+    return [label for _, label, _ in made], [count for _, _, count in made], colors
+
+
+def event_bands(events):
+    """Start month and colour of every shaded band: month ``i``'s event covers ``[i, i + 1]``."""
+    colors = {event: next((c for word, c in EVENT_BAND_COLORS.items() if word in event), None)
+              for event in set(events)}
+    shaded = [(i, colors[event]) for i, event in enumerate(events) if colors[event] is not None]
+    return np.array([start for start, _ in shaded], dtype=float), [color for _, color in shaded]
+
+
+@_rasterized
+def decisions_png(decision_counts):
+    """Pie of the choices made over a game, rendered to PNG bytes."""
+    from matplotlib.figure import Figure
+
+    labels, counts, colors = _pie_slices(decision_counts)
+    fig = Figure()
+    ax = fig.subplots()
+    ax.pie(counts, labels=labels, autopct='%1.1f%%', colors=colors)
+    ax.set_title('Your Financial Choices')
+    return fig
+
+
+@_rasterized
+def growth_png(money, events):
+    """Net worth by month with the event months shaded, rendered to PNG bytes."""
+    from matplotlib.collections import PolyCollection
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(np.arange(len(money)), money, marker='o' if len(money) <= 60 else None, linewidth=2)
+
+    # One collection for all the bands, spanning the full height whatever the y range
+    starts, colors = event_bands(events)
+    corners = np.array([[0, 0], [0, 1], [1, 1], [1, 0]], dtype=float)
+    bands = np.repeat(corners[None], len(starts), axis=0)
+    bands[:, :, 0] += starts[:, None]
+    ax.add_collection(PolyCollection(bands, facecolors=colors, alpha=0.2, linewidths=0,
+                                     transform=ax.get_xaxis_transform()))
+
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Net Worth (₹)')
+    ax.set_title(f'{len(money) - 1}-Month Financial Journey')
+    ax.grid(True)
+    return fig
+
+
+# ----- Client-side (Plotly) Figures -----
+def heatmap_figure(employment_factor, loan_type_factor, loan_term):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Heatmap(
+        z=heatmap_data(employment_factor, loan_type_factor, loan_term),
+        x=HEATMAP_SCORES, y=HEATMAP_INCOMES, colorscale="YlGnBu",
+        colorbar=dict(title="Loan Amount ($)"),
+    ))
+    fig.update_layout(
+        title="Credit Score vs Income vs Predicted Loan Amount",
+        xaxis_title="Credit Score",
+        yaxis_title="Monthly Income ($)",
+        yaxis_autorange="reversed",  # lowest income on top, like the seaborn heatmap
+    )
+    return fig
+
+
+def savings_figure(months, cumulative_savings, emi):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=months, y=cumulative_savings, mode='lines', name="Net Savings Over Time",
+                             line=dict(color='green')))
+    fig.add_trace(go.Scatter(x=[months[0], months[-1]], y=[emi, emi], mode='lines', name="Monthly EMI",
+                             line=dict(color='red', dash='dash')))
+    fig.update_layout(title="Financial Simulation Over Loan Period", xaxis_title="Months", yaxis_title="Amount ($)")
+    return fig
+
+
+def term_sweep_figure(sim_loan_amount, sim_income, sim_interest, sim_duration):
+    import plotly.graph_objects as go
+
+    sweep = term_sweep(sim_loan_amount, sim_income, sim_interest, sim_duration)
+    fig = go.Figure(go.Scatter(x=sweep["terms"], y=sweep["ratios"], mode='lines+markers',
+                               name="Debt-to-Income Ratio (%)", line=dict(color='orange')))
+    fig.add_vline(x=sim_duration, line_dash='dash', line_color='red',
+                  annotation_text=f"Selected Term ({sim_duration} yrs)")
+    fig.update_layout(title="📉 Financial Impact of Loan Duration",
+                      xaxis_title="Loan Term (Years)", yaxis_title="Debt-to-Income Ratio (%)")
+    return fig
+
+
+def amortization_figure(sim_loan_amount, sim_interest, sim_duration):
+    import plotly.graph_objects as go
+
+    schedule = amortization_schedule(sim_loan_amount, sim_interest, sim_duration)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=schedule["months"], y=schedule["interest"], name="Interest",
+                             stackgroup="emi", line=dict(color='#ff9999')))
+    fig.add_trace(go.Scatter(x=schedule["months"], y=schedule["principal"], name="Principal",
+                             stackgroup="emi", line=dict(color='#66b3ff')))
+    fig.add_trace(go.Scatter(x=schedule["months"], y=schedule["balance"], name="Outstanding Balance",
+                             yaxis="y2", line=dict(color='black')))
+    fig.update_layout(title="Amortization Schedule", xaxis_title="Months", yaxis_title="Monthly EMI ($)",
+                      yaxis2=dict(title="Outstanding Balance ($)", overlaying="y", side="right"))
+    return fig
+
+
+def affordability_figure(sim_income, sim_interest, sim_duration, sim_loan_amount):
+    import plotly.graph_objects as go
+
+    ratios, rate = _affordability_slice(sim_income, sim_interest)
+    fig = go.Figure()
+    fig.add_trace(go.Contour(x=sensitivity.TERMS, y=sensitivity.AMOUNTS, z=np.minimum(ratios, 100),
+                             colorscale="RdYlGn", reversescale=True, contours=dict(start=0, end=100, size=10),
+                             colorbar=dict(title="Debt-to-Income (%)")))
+    fig.add_trace(go.Contour(x=sensitivity.TERMS, y=sensitivity.AMOUNTS, z=ratios, showscale=False,
+                             contours=dict(coloring="none", showlabels=True,
+                                           start=scoring.COMFORTABLE_DTI, end=scoring.HIGH_DTI,
+                                           size=scoring.HIGH_DTI - scoring.COMFORTABLE_DTI),
+                             line=dict(color='black', width=2)))
+    fig.add_trace(go.Scatter(x=[sim_duration], y=[sim_loan_amount], mode='markers',
+                             marker=dict(color='blue', size=10), name="Your Loan"))
+    fig.update_layout(title=f"Affordability at {rate:.1f}% Interest",
+                      xaxis_title="Loan Term (Years)", yaxis_title="Loan Amount ($)")
+    return fig
+
+
+def decisions_figure(decision_counts):
+    import plotly.graph_objects as go
+
+    labels, counts, colors = _pie_slices(decision_counts)
+    fig = go.Figure(go.Pie(labels=labels, values=counts, marker=dict(colors=colors), sort=False))
+    fig.update_layout(title='Your Financial Choices')
+    return fig
+
+
+def growth_figure(money, events):
+    """Net worth by month with Bull Run / Recession months shaded."""
+    import plotly.graph_objects as go
+
+    # The bands are one bar trace on a hidden 0-1 axis rather than a shape per month
+    starts, colors = event_bands(events)
+    fig = go.Figure([
+        go.Bar(x=starts + 0.5, y=np.ones(len(starts)), width=1, marker=dict(color=colors, line_width=0),
+               opacity=0.2, yaxis='y2', hoverinfo='skip', showlegend=False),
+        go.Scatter(x=np.arange(len(money)), y=money, mode='lines+markers' if len(money) <= 60 else 'lines',
+                   showlegend=False),
+    ])
+    fig.update_layout(yaxis2=dict(range=[0, 1], visible=False, overlaying='y', side='right'), bargap=0)
+    fig.update_layout(title=f'{len(money) - 1}-Month Financial Journey', xaxis_title='Month',
+                      yaxis_title='Net Worth (₹)')
+    return fig
+
+
+# ----- Stats -----
+CACHED = {
+    "heatmap_data": heatmap_data,
+    "heatmap_png": heatmap_png,
+    "term_sweep": term_sweep,
+    "term_sweep_png": term_sweep_png,
+    "amortization_schedule": amortization_schedule,
+    "amortization_png": amortization_png,
+    "savings_png": savings_png,
+    "dti_surface": dti_surface,
+    "affordability_png": affordability_png,
+}
+
+
+def cache_stats():
+    """Hit/miss counters and current size of every chart cache."""
+    return {name: func.cache_info()._asdict() for name, func in CACHED.items()}
+
+
+def cache_clear():
+    for func in CACHED.values():
+        func.cache_clear()
@@ -0,0 +1,165 @@
+"""Rules of the Financial Journey Game.
+
+The market events, return rates, loan terms and end-of-game scoring of the
+classic game live here; ``RULES`` is the same game as a rule set for the
+engine (``game_engine``) that the interactive tab and the Monte Carlo
+simulations play through. The same events also drive the income and rate
+shocks of the loan book stress test (``stress``).
+
+Every interactive game has its own seed. The market event of a month is a
+pure function of (seed, month) (``event_codes``), so a game's events never
+depend on other sessions or on the order games are played in, and can be
+recomputed from a logged seed, for one game or for many at once.
+"""
+import secrets
+
+import numpy as np
+
+# ----- Game Constants -----
+MONTHS = 24
+STARTING_MONEY = 100000  # ₹1L
+
+INVEST_BASE_RETURN = 0.15  # per investing month, before the event impact
+SAVE_BASE_RETURN = 0.04    # per saving month, before the event impact
+BORROW_AMOUNT = 10000
+BORROW_RATE = 12           # % a year
+BORROW_TERM_MONTHS = 12    # every loan is amortized over a year, first EMI in the month it is taken
+DEFAULT_INVEST_PERCENTAGE = 20
+
+CHOICES = ["Invest", "Save", "Borrow"]
+INVEST, SAVE, BORROW = range(len(CHOICES))
+
+# Market events with descriptions and impacts
+MARKET_EVENTS = {
+    "🔥 Inflation": {
+        "description": "Rising prices reduce the value of your money!",
+        "invest_impact": -0.02,  # -2% on investments
+        "save_impact": -0.03,    # -3% on savings
+        "income_impact": -0.005,  # loan stress test: -0.5% real income a month
+        "rate_impact": 0.25,      # loan stress test: rates +0.25 points a month
+        "probability": 0.25
+    },
+    "📉 Recession": {
+        "description": "Economic downturn hits investments hard!",
+        "invest_impact": -0.15,  # -15% on investments
+        "save_impact": 0,        # No impact on savings
+        "income_impact": -0.02,  # -2% income a month
+        "rate_impact": -0.25,    # rates cut by 0.25 points a month
+        "probability": 0.15
+    },
+    "🚀 Bull Run": {
+        "description": "Markets are soaring! Great for investments!",
+        "invest_impact": 0.25,   # +25% on investments
+        "save_impact": 0,        # No impact on savings
+        "income_impact": 0.01,   # +1% income a month
+        "rate_impact": 0.1,      # rates +0.1 points a month
+        "probability": 0.15
+    },
+    "🧊 Stagnation": {
+        "description": "Nothing much happening in the markets.",
+        "invest_impact": 0.02,   # +2% on investments
+        "save_impact": 0,        # No impact on savings
+        "income_impact": 0,      # No impact on income
+        "rate_impact": 0,        # No impact on rates
+        "probability": 0.45
+    }
+}
+
+# The same table as arrays indexed by event code (position in MARKET_EVENTS)
+EVENT_NAMES = list(MARKET_EVENTS)
+EVENT_PROBABILITIES = np.array([e["probability"] for e in MARKET_EVENTS.values()])
+INVEST_IMPACTS = np.array([e["invest_impact"] for e in MARKET_EVENTS.values()], dtype=float)
+SAVE_IMPACTS = np.array([e["save_impact"] for e in MARKET_EVENTS.values()], dtype=float)
+INCOME_IMPACTS = np.array([e["income_impact"] for e in MARKET_EVENTS.values()], dtype=float)
+RATE_IMPACTS = np.array([e["rate_impact"] for e in MARKET_EVENTS.values()], dtype=float)
+_EVENT_CDF = np.cumsum(EVENT_PROBABILITIES)
+
+SEED_BITS = 63  # seeds fit a signed 64-bit integer, e.g. a SQLite INTEGER
+
+# The classic game as a game_engine rule set; choice and event codes match CHOICES and EVENT_NAMES
+RULES = {
+    "months": MONTHS,
+    "starting_money": STARTING_MONEY,
+    "assets": [
+        {"name": "Investments", "base_return": INVEST_BASE_RETURN},
+        {"name": "Savings", "base_return": SAVE_BASE_RETURN, "cash": True},
+    ],
+    "loans": [
+        {"name": "Loan", "amount": BORROW_AMOUNT, "annual_rate": BORROW_RATE, "term_months": BORROW_TERM_MONTHS},
+    ],
+    "choices": [
+        {"name": "Invest", "asset": "Investments"},
+        {"name": "Save", "asset": "Savings"},
+        {"name": "Borrow", "loan": "Loan"},
+    ],
+    "events": [
+        {"name": name, "description": e["description"], "probability": e["probability"],
+         "impacts": {"Investments": e["invest_impact"], "Savings": e["save_impact"]}}
+        for name, e in MARKET_EVENTS.items()
+    ],
+}
+
+# Personality thresholds on the number of months spent on each choice
+BOLD_INVESTOR_MONTHS = 15
+SAFE_SAVER_MONTHS = 15
+LEVERAGE_LOVER_MONTHS = 10
+
+PERSONALITIES = {
+    "Bold Investor 🚀": "You're not afraid of risk and aim for big returns!",
+    "Safe Saver 🛡️": "You prioritize stability and steady growth.",
+    "Leverage Lover 💳": "You use loans strategically to boost your growth.",
+    "Balanced Planner ⚖️": "You take a diversified approach to finances.",
+}
+
+
+def new_seed():
+    return secrets.randbits(SEED_BITS)
+
+
+def event_codes(seed, month, cdf=_EVENT_CDF):
+    """Market event code of ``month`` (0-based) in the game seeded with ``seed``.
+
+    A counter-based generator: the SplitMix64 mix of (seed, month) gives a
+    uniform draw that picks the event by ``EVENT_PROBABILITIES`` (or by the
+    cumulative probabilities ``cdf`` of another event table). Works on
+    scalars and on arrays, which broadcast together.
+    """
+    counter = np.asarray(month, dtype=np.uint64) + np.uint64(1)
+    with np.errstate(over="ignore"):  # uint64 arithmetic wraps on purpose
+        z = np.asarray(seed, dtype=np.uint64) + counter * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    uniform = (z >> np.uint64(11)) * 2.0 ** -53
+    code = np.minimum(np.searchsorted(cdf, uniform, side="right"), len(cdf) - 1).astype(np.int8)
+    return code.item() if code.ndim == 0 else code
+
+
+def personality_code(invest_months, save_months, borrow_months, months=MONTHS):
+    """Index into ``PERSONALITIES``; works on scalars and on arrays of counts.
+
+    The thresholds are for a ``MONTHS`` game and scale with ``months``.
+    """
+    scale = months / MONTHS
+    code = np.select(
+        [np.asarray(invest_months) > BOLD_INVESTOR_MONTHS * scale,
+         np.asarray(save_months) > SAFE_SAVER_MONTHS * scale,
+         np.asarray(borrow_months) > LEVERAGE_LOVER_MONTHS * scale],
+        [0, 1, 2],
+        3,
+    )
+    return code.item() if code.ndim == 0 else code
+
+
+def personality(decision_counts):
+    """(personality, description) for a dict of decision counts."""
+    code = personality_code(decision_counts["Invest"], decision_counts["Save"], decision_counts["Borrow"])
+    name = list(PERSONALITIES)[code]
+    return name, PERSONALITIES[name]
+
+
+def risk_score(invest_months, borrow_months, months=MONTHS):
+    """Risk score from 0 to 100; works on scalars and on arrays of counts."""
+    score = (np.asarray(invest_months) * 4 + np.asarray(borrow_months) * 5) / months
+    score = np.minimum(score * 10, 100)  # Scale to 0-100
+    return score.item() if score.ndim == 0 else score
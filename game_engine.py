@@ -0,0 +1,413 @@
+"""Rules-driven engine of the Financial Journey Game.
+
+The rules are data: the game length, starting money, asset classes, loan
+products, the choices offered each month and the market event table. The
+classic game is ``game.RULES``; other rule sets are JSON files with the same
+keys (see ``game_rules.json``, a 10-year game with several assets and loans):
+
+- ``assets``: ``name``, ``base_return`` a month and optionally
+  ``every_month`` (earn every month rather than only when chosen). One asset
+  has ``"cash": true``; it holds the starting money and pays the EMIs;
+- ``loans``: ``name``, ``amount``, ``annual_rate`` (%) and ``term_months``.
+  Every loan taken is amortized on its own: a fixed EMI from the month it
+  is taken, until it is paid off ``term_months`` later;
+- ``choices``: ``name`` plus an ``asset`` (move the chosen percentage of
+  cash into it, or keep cash for the cash asset; the asset earns this
+  month) or a ``loan`` (take one);
+- ``events``: ``name``, ``description``, ``probability`` and ``impacts``,
+  the return added to each asset's base return in that month.
+
+``Portfolios`` is the state of many games, one array slot per game, and
+``Portfolios.step`` plays one month for all of them in a handful of NumPy
+operations, whatever the number of loans taken. Loans of one product share
+a rate, so their balances are kept as one sum per game; the product taken
+in each of the last ``term_months`` months is one small int per game, and a
+loan's EMI drops out of the sum when its term is up. ``GameState``
+is one interactive game on top of a one-slot ``Portfolios``. The app and
+the bulk simulations (``game_sim``, ``optimizer``, ``game_log.replay_all``)
+all play through ``step``.
+
+Every rule set has a ``fingerprint``: a hash of its config and of
+``ENGINE_VERSION``. Game logs, leaderboard results and saved sessions carry
+it, so games played under other rules (or by another engine version) are
+never replayed or ranked as if they were played under the current ones.
+
+    python game_engine.py game_rules.json           # check a rules file
+"""
+import hashlib
+import json
+import struct
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+import amortization
+import game
+import scoring
+
+RULES_KEYS = ("months", "starting_money", "assets", "loans", "choices", "events")
+DUST = 1e-6  # EMIs and balances below this are rounding left by paid-off loans
+# Bump whenever ``Portfolios.step`` plays the same rules differently
+ENGINE_VERSION = 2
+
+
+class Rules:
+    """A validated rule set, with its tables as arrays indexed by code."""
+
+    def __init__(self, config):
+        missing = [key for key in RULES_KEYS if key not in config]
+        if missing:
+            raise ValueError(f"game rules are missing {', '.join(missing)}")
+        canonical = json.dumps([ENGINE_VERSION, config], sort_keys=True, separators=(",", ":"))
+        self.fingerprint = int.from_bytes(hashlib.blake2b(canonical.encode(), digest_size=4).digest(), "little")
+        self.months = int(config["months"])
+        self.starting_money = float(config["starting_money"])
+        if self.months < 1:
+            raise ValueError("game rules: 'months' must be at least 1")
+
+        assets, loans, events = config["assets"], config["loans"], config["events"]
+        self.asset_names = [a["name"] for a in assets]
+        cash = [i for i, a in enumerate(assets) if a.get("cash")]
+        if len(cash) != 1:
+            raise ValueError("game rules need exactly one asset with \"cash\": true")
+        self.cash = cash[0]
+        self.every_month = np.array([bool(a.get("every_month")) for a in assets])
+
+        self.loan_names = [loan["name"] for loan in loans]
+        self.loan_amounts = np.array([float(loan["amount"]) for loan in loans])
+        self.loan_annual_rates = np.array([float(loan["annual_rate"]) for loan in loans])
+        self.loan_rates = self.loan_annual_rates / 1200  # a month
+        self.loan_terms = np.array([int(loan["term_months"]) for loan in loans], dtype=np.intp)
+        if (self.loan_terms < 1).any():
+            raise ValueError("game rules: every loan needs 'term_months' >= 1")
+        self.loan_emis = np.atleast_1d(scoring.emi(self.loan_amounts, self.loan_annual_rates, self.loan_terms))
+        self.ring = int(self.loan_terms.max()) if loans else 1  # months of loan history kept
+
+        self.event_names = [e["name"] for e in events]
+        self.event_descriptions = {e["name"]: e.get("description", "") for e in events}
+        self.event_probabilities = np.array([float(e["probability"]) for e in events])
+        if not events or abs(self.event_probabilities.sum() - 1) > 1e-9:
+            raise ValueError("game rules: event probabilities must add up to 1")
+        self.event_cdf = np.cumsum(self.event_probabilities)
+        # Return of every asset under every event, indexed [asset, event]
+        self.returns = np.array([[a["base_return"] + e.get("impacts", {}).get(a["name"], 0.0) for e in events]
+                                 for a in assets], dtype=float)
+        for e in events:
+            unknown = set(e.get("impacts", {})) - set(self.asset_names)
+            if unknown:
+                raise ValueError(f"game rules: event {e['name']!r} impacts unknown assets {sorted(unknown)}")
+
+        self.choices = [c["name"] for c in config["choices"]]
+        if len(self.choices) > 127 or len(self.loan_names) > 127:
+            raise ValueError("game rules: at most 127 choices and 127 loans")
+        self.choice_assets = np.full(len(self.choices), -1, dtype=np.intp)
+        self.choice_loans = np.full(len(self.choices), -1, dtype=np.intp)
+        for code, choice in enumerate(config["choices"]):
+            if ("asset" in choice) == ("loan" in choice):
+                raise ValueError(f"game rules: choice {choice['name']!r} needs one of 'asset' or 'loan'")
+            try:
+                if "asset" in choice:
+                    self.choice_assets[code] = self.asset_names.index(choice["asset"])
+                else:
+                    self.choice_loans[code] = self.loan_names.index(choice["loan"])
+            except ValueError:
+                raise ValueError(f"game rules: choice {choice['name']!r} refers to an unknown "
+                                 f"{'asset' if 'asset' in choice else 'loan'}") from None
+        # Code -1 (no choice) indexes the trailing -1 (or 0) of these
+        self._step_assets = np.append(self.choice_assets, -1)
+        self._step_loans = np.append(self.choice_loans, -1).astype(np.int8)
+        self._step_loan_amounts = np.append(self.loan_amounts, 0.0)
+        self._choice_codes = np.arange(len(self.choices))[:, None]
+        self._asset_codes = np.arange(len(self.asset_names))[:, None]
+        self._loan_codes = np.arange(len(self.loan_names))[:, None]
+        # Classic Invest / Save / Borrow kind of every choice, for personalities and risk
+        self.kinds = np.where(self.choice_loans >= 0, game.BORROW,
+                              np.where(self.choice_assets == self.cash, game.SAVE, game.INVEST))
+        # Event code -1 is the average event: the probability-weighted return of every asset
+        self._step_returns = np.append(self.returns, (self.returns @ self.event_probabilities)[:, None], axis=1)
+        # Event luck's reference strategy: every asset choice in turn, never a loan
+        self._reference_choices = np.flatnonzero(self.choice_assets >= 0)
+        self._reference_expected = {}  # months -> its growth (%) under average events
+
+    def event_code(self, seed, month):
+        """Market event code of ``month`` in the game seeded with ``seed`` (see ``game.event_codes``)."""
+        return game.event_codes(seed, month, self.event_cdf)
+
+    def draw_events(self, rng, n_games, months=None):
+        """Event codes for every game and month, ``(months, n_games)``, drawn in one call."""
+        return rng.choice(len(self.event_names), size=(months or self.months, n_games),
+                          p=self.event_probabilities).astype(np.int8)
+
+    def kind_counts(self, counts):
+        """Months spent investing, saving and borrowing from per-choice ``counts``."""
+        counts = np.asarray(counts)
+        return [counts[self.kinds == kind].sum(axis=0) for kind in range(len(game.CHOICES))]
+
+    def personality_code(self, counts, months=None):
+        invest, save, borrow = self.kind_counts(counts)
+        return game.personality_code(invest, save, borrow, months or self.months)
+
+    def risk_score(self, counts, months=None):
+        invest, _, borrow = self.kind_counts(counts)
+        return game.risk_score(invest, borrow, months or self.months)
+
+    def event_luck(self, event_codes):
+        """Growth (%) the market events gave a fixed reference strategy above its expected growth.
+
+        The reference plays every asset choice in turn, investing
+        ``game.DEFAULT_INVEST_PERCENTAGE``, and never borrows. Luck is its
+        growth on these events (``event_codes``, ``(months,)`` or
+        ``(months, games)``) minus its growth under average events over as
+        many months. That is in the same units as a game's growth, with the
+        same reference for every player, so ``growth - luck`` ranks games
+        whatever their length or choices. Positive means a lucky game.
+        """
+        codes = np.asarray(event_codes)
+        months = len(codes)
+        if months not in self._reference_expected:
+            # The month step is linear in the holdings and the months' events are
+            # independent, so playing average events gives the exact expectation
+            self._reference_expected[months] = self._reference_growth(np.full(months, -1)).item()
+        luck = self._reference_growth(codes) - self._reference_expected[months]
+        return luck.item() if luck.ndim == 0 else luck
+
+    def _reference_growth(self, event_codes):
+        portfolio = Portfolios(self, event_codes.shape[1] if event_codes.ndim == 2 else 1)
+        for month, events in enumerate(event_codes):
+            choice = self._reference_choices[month % len(self._reference_choices)]
+            portfolio.step(choice, game.DEFAULT_INVEST_PERCENTAGE, events)
+        growth = (portfolio.net_worth - self.starting_money) / self.starting_money * 100
+        return growth if event_codes.ndim == 2 else growth[0]
+
+
+def load(path):
+    """Rules from a JSON file."""
+    with open(path, encoding="utf-8") as f:
+        return Rules(json.load(f))
+
+
+@lru_cache(maxsize=None)
+def classic():
+    """The classic 24-month game, ``game.RULES``."""
+    return Rules(game.RULES)
+
+
+class Portfolios:
+    """State of many games playing the same rules, one array slot per game."""
+
+    def __init__(self, rules, n_games):
+        self.rules = rules
+        self.month = 0
+        self.holdings = np.zeros((len(rules.asset_names), n_games))
+        self.holdings[rules.cash] = rules.starting_money
+        # Outstanding balance and total EMI of every loan product
+        self.balance = np.zeros((len(rules.loan_names), n_games))
+        self.emi = np.zeros((len(rules.loan_names), n_games))
+        # Loan product taken (-1: none) in each of the last ``rules.ring`` months, by month % ring
+        self.taken = np.full((rules.ring, n_games), -1, dtype=np.int8)
+        self.counts = np.zeros((len(rules.choices), n_games), dtype=np.int16)
+
+    def __len__(self):
+        return self.holdings.shape[1]
+
+    @property
+    def savings(self):
+        return self.holdings[self.rules.cash]
+
+    @property
+    def investment(self):
+        return self.holdings.sum(axis=0) - self.savings
+
+    @property
+    def loan(self):
+        return self.balance.sum(axis=0)
+
+    @property
+    def net_worth(self):
+        return self.holdings.sum(axis=0) - self.loan
+
+    def step(self, choices, invest_percentage, events):
+        """Play one month for every game.
+
+        ``choices`` are codes into ``rules.choices`` (-1 skips the choice,
+        the month's returns and EMIs still apply), ``events`` codes into
+        ``rules.event_names``; both, and ``invest_percentage``, are scalars
+        shared by all games or arrays with one entry per game.
+        """
+        # Scalars stay scalars and broadcast against the (assets | loans, games) arrays
+        rules = self.rules
+        choices = np.asarray(choices)
+        events = np.atleast_1d(events)
+        month, slot = self.month, self.month % rules.ring
+
+        # Loans whose last EMI was paid last month stop paying
+        for loan, term in enumerate(rules.loan_terms):
+            if month >= term:
+                self.emi[loan] -= (self.taken[(month - term) % rules.ring] == loan) * rules.loan_emis[loan]
+        if len(rules.loan_names):
+            self.emi[self.emi < DUST] = 0
+
+        # One-hot masks rather than fancy indexing: several times faster on large arrays
+        self.counts += rules._choice_codes == choices
+
+        # Investing moves a percentage of cash into the chosen asset
+        asset = rules._step_assets.take(choices)
+        chosen = rules._asset_codes == asset
+        cash = self.holdings[rules.cash]
+        moved = np.where((asset >= 0) & (asset != rules.cash), np.asarray(invest_percentage) / 100 * cash, 0.0)
+        cash -= moved
+        self.holdings += chosen * moved
+
+        # Borrowing adds the loan to cash and its balance and EMI to the product's totals
+        loan = rules._step_loans.take(choices)
+        self.taken[slot] = loan
+        if (loan >= 0).any():
+            borrowed = rules._loan_codes == loan
+            cash += rules._step_loan_amounts.take(loan)
+            self.balance += borrowed * rules.loan_amounts[:, None]
+            self.emi += borrowed * rules.loan_emis[:, None]
+
+        # The chosen asset and every-month assets earn this month's return
+        earning = chosen | rules.every_month[:, None]
+        self.holdings += np.where(earning, self.holdings * rules._step_returns.take(events, axis=1), 0.0)
+
+        # EMI payments: interest accrues on every balance, then the EMI comes off
+        if len(rules.loan_names):
+            cash -= self.emi.sum(axis=0)
+            self.balance *= 1 + rules.loan_rates[:, None]
+            self.balance -= self.emi
+            self.balance[self.emi == 0] = 0
+        self.month += 1
+
+
+class GameState:
+    """One interactive game: a one-slot ``Portfolios`` plus its history.
+
+    The net worth after every month is a fixed-size float array and the
+    choices and market events are stored as small-int codes (indexes into
+    ``rules.choices`` and ``rules.event_names``). ``to_bytes``/``from_bytes``
+    give a compact form for session stores.
+    """
+
+    __slots__ = ("rules", "portfolio", "history", "codes", "seed")
+
+    _MAGIC = b"FJG3"
+    _HEADER = struct.Struct("<4sHIQ")  # magic, month, rules fingerprint, seed
+
+    def __init__(self, rules=None, seed=None):
+        self.rules = rules or classic()
+        self.seed = game.new_seed() if seed is None else seed
+        self.portfolio = Portfolios(self.rules, 1)
+        self.history = np.zeros(self.rules.months + 1)  # net worth at the start and after every month
+        self.history[0] = self.rules.starting_money
+        self.codes = np.full((2, self.rules.months), -1, dtype=np.int8)  # row 0: choices, row 1: events
+
+    @property
+    def month(self):
+        return self.portfolio.month
+
+    @property
+    def months(self):
+        return self.rules.months
+
+    @property
+    def finished(self):
+        return self.month >= self.months
+
+    @property
+    def money(self):
+        """Net worth so far, starting amount first."""
+        return self.history[:self.month + 1]
+
+    @property
+    def choices(self):
+        return [self.rules.choices[c] for c in self.codes[0, :self.month]]
+
+    @property
+    def events(self):
+        return [self.rules.event_names[e] for e in self.codes[1, :self.month]]
+
+    @property
+    def holdings(self):
+        """Balance of every asset, by name."""
+        return dict(zip(self.rules.asset_names, self.portfolio.holdings[:, 0].tolist()))
+
+    @property
+    def loan_amount(self):
+        return float(self.portfolio.loan[0])
+
+    def next_event(self):
+        """The market event this game will see in its current month."""
+        return self.rules.event_names[self.rules.event_code(self.seed, self.month)]
+
+    def decision_counts(self):
+        return dict(zip(self.rules.choices, self.portfolio.counts[:, 0].tolist()))
+
+    def loans(self):
+        """Every loan taken so far, with its EMI, payments made and outstanding balance."""
+        rules, taken = self.rules, []
+        for month, code in enumerate(self.codes[0, :self.month]):
+            loan = rules.choice_loans[code]
+            if loan < 0:
+                continue
+            amount, term = rules.loan_amounts[loan], rules.loan_terms[loan]
+            paid = min(self.month - month, term)
+            balance = amortization.balance_after(amount, rules.loan_annual_rates[loan], term, paid)
+            taken.append({"loan": rules.loan_names[loan], "month": month + 1, "amount": float(amount),
+                          "emi": float(rules.loan_emis[loan]), "payments_left": int(term - paid),
+                          "balance": float(balance) if paid < term else 0.0})
+        return taken
+
+    def play_month(self, decision, invest_percentage, event):
+        """Apply one month's decision and market event; returns the new net worth."""
+        choice, event_code = self.rules.choices.index(decision), self.rules.event_names.index(event)
+        month = self.month
+        self.portfolio.step(choice, invest_percentage, event_code)
+        self.codes[:, month] = choice, event_code
+        self.history[month + 1] = new_total = float(self.portfolio.net_worth[0])
+        return new_total
+
+    def to_bytes(self):
+        p = self.portfolio
+        header = self._HEADER.pack(self._MAGIC, self.month, self.rules.fingerprint, self.seed)
+        return b"".join([header, self.history.tobytes(), self.codes.tobytes(), p.holdings.tobytes(),
+                         p.balance.tobytes(), p.emi.tobytes(), p.taken.tobytes(), p.counts.tobytes()])
+
+    @classmethod
+    def from_bytes(cls, data, rules=None):
+        """The game in ``data``; ValueError if it was saved by another rule set or format."""
+        magic, month, fingerprint, seed = cls._HEADER.unpack_from(data)
+        state = cls(rules, seed=seed)
+        p = state.portfolio
+        arrays = [state.history, state.codes, p.holdings, p.balance, p.emi, p.taken, p.counts]
+        if magic != cls._MAGIC or fingerprint != state.rules.fingerprint or len(data) != cls._HEADER.size + sum(
+                a.nbytes for a in arrays):
+            raise ValueError("game state was saved by another version or rule set")
+        offset = cls._HEADER.size
+        for a in arrays:
+            a[...] = np.frombuffer(data, dtype=a.dtype, count=a.size, offset=offset).reshape(a.shape)
+            offset += a.nbytes
+        p.month = month
+        return state
+
+
+def main(argv=None):
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths:
+        print("usage: python game_engine.py RULES.json [...]", file=sys.stderr)
+        return 2
+    for path in paths:
+        try:
+            rules = load(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"{path}: {e!r}" if isinstance(e, KeyError) else f"{path}: {e}", file=sys.stderr)
+            return 1
+        print(f"{path}: {rules.months} months, assets {', '.join(rules.asset_names)}; "
+              f"loans {', '.join(rules.loan_names) or 'none'}; choices {', '.join(rules.choices)}; "
+              f"{len(rules.event_names)} events; fingerprint {rules.fingerprint:08x}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
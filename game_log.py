@@ -0,0 +1,272 @@
+"""Append-only event log of Financial Journey games, and replay.
+
+Every month played in the app is appended as one fixed-size binary record
+(``RECORD``: game id, seed, rules fingerprint, month, choice code, invest %,
+event code; 33 bytes) after an 8-byte file header (``MAGIC``). The log is
+the audit trail of every game. Because a game's
+market events are a function of its seed (``game.event_codes``), each
+record can also be checked against the seed.
+
+``LogWriter`` never writes on the caller's thread: ``append`` queues the
+record, and a background thread writes the queue in batches and fsyncs
+every ``flush_interval`` seconds. A "Proceed to Next Month" click only pays
+for packing 33 bytes. A log written before records carried a fingerprint
+is moved aside to ``<path>.v1`` when a writer opens it, never appended to.
+
+Replay:
+
+- ``replay(records, game_id)`` rebuilds the ``game_engine.GameState`` of
+  one game (optionally as of an earlier month), re-playing it month by month;
+- ``replay_all(records)`` recomputes every logged game at once with the
+  vectorized ``game_engine.Portfolios``, for analytics over thousands of games.
+
+Choice and event codes index the rules the games were played by (the
+classic game unless the app ran with ``LOAN_GAME_RULES``); replay with the
+same rules (``--rules``). Records stamped with another rules fingerprint
+(``game_engine.Rules.fingerprint``) are refused by ``replay`` and left out
+of ``replay_all``.
+
+    python game_log.py replay game_log.bin 3f2a...   # month-by-month of one game
+    python game_log.py stats game_log.bin            # bulk replay of every game
+"""
+import argparse
+import atexit
+import os
+import struct
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+import game_engine
+
+DEFAULT_LOG_PATH = "game_log.bin"
+DEFAULT_FLUSH_INTERVAL = 0.5  # seconds
+
+MAGIC = b"FJGLOG2\n"
+# game id (UUID bytes), seed, rules fingerprint, month (0-based), choice code, invest %, event code
+RECORD = np.dtype([("game", "S16"), ("seed", "<u8"), ("rules", "<u4"), ("month", "<u2"),
+                   ("choice", "i1"), ("invest", "u1"), ("event", "u1")])
+_PACK = struct.Struct("<16sQIHbBB")
+assert _PACK.size == RECORD.itemsize
+
+
+def _game_key(game_id):
+    return uuid.UUID(hex=game_id).bytes
+
+
+class LogWriter:
+    """Batched, fsynced appends to the log file from a background thread."""
+
+    def __init__(self, path=DEFAULT_LOG_PATH, flush_interval=DEFAULT_FLUSH_INTERVAL, rules=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fingerprint = (rules or game_engine.classic()).fingerprint
+        self.written = 0  # records on disk
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        if os.path.exists(path) and os.path.getsize(path) and not _has_magic(path):
+            os.replace(path, f"{path}.v1")  # older format: keep it, but never mix the two
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+            self._file.flush()
+        self._thread = threading.Thread(target=self._run, name="game-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, game_id, seed, month, choice, invest_percentage, event):
+        """Queue one played month; ``choice`` and ``event`` are codes."""
+        record = _PACK.pack(_game_key(game_id), seed, self.fingerprint, month, choice, int(invest_percentage),
+                            event)
+        with self._lock:
+            if self._closed:
+                raise ValueError("game log is closed")
+            self._pending.append(record)
+
+    def flush(self):
+        """Write and fsync everything queued so far (blocks the caller)."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._file.write(b"".join(batch))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.written += len(batch)
+
+    def _run(self):
+        while not self._wake.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+        atexit.unregister(self.close)
+
+
+def _has_magic(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read(path=DEFAULT_LOG_PATH):
+    """Every record in the log as a structured array of ``RECORD``.
+
+    A record torn by a crash mid-write is ignored. Raises ValueError for a
+    file that is not a log in this format.
+    """
+    data = np.fromfile(path, dtype=np.uint8)
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a game log in the current format")
+    data = data[len(MAGIC):]
+    whole = len(data) - len(data) % RECORD.itemsize
+    return data[:whole].view(RECORD)
+
+
+# ----- Replay -----
+def replay(records, game_id, until_month=None, rules=None):
+    """Rebuild one game's ``GameState`` under ``rules`` (default: classic) from its records.
+
+    With ``until_month`` the game is replayed only up to that many months.
+    Raises ValueError if the game is not in the log, was played under
+    other rules, has a gap, or a record's event does not match the game's
+    seed.
+    """
+    mine = records[records["game"] == _game_key(game_id)]
+    if len(mine) == 0:
+        raise ValueError(f"game {game_id} is not in the log")
+    state = game_engine.GameState(rules, seed=int(mine["seed"][0]))
+    rules = state.rules
+    if (mine["rules"] != rules.fingerprint).any():
+        raise ValueError(f"game {game_id} was played under other rules (fingerprint {int(mine['rules'][0]):08x}, "
+                         f"not {rules.fingerprint:08x}); replay it with the rules it was played by")
+    mine = mine[np.argsort(mine["month"], kind="stable")]
+    if until_month is not None:
+        mine = mine[mine["month"] < until_month]
+
+    for record in mine:
+        month, event = int(record["month"]), int(record["event"])
+        if month != state.month:
+            raise ValueError(f"game {game_id} has no record for month {state.month + 1}")
+        if event != rules.event_code(state.seed, month):
+            raise ValueError(f"game {game_id}: month {month + 1} event does not match the seed")
+        state.play_month(rules.choices[record["choice"]], int(record["invest"]), rules.event_names[event])
+    return state
+
+
+def replay_all(records, rules=None):
+    """Recompute every game in ``records`` at once under ``rules`` (default: classic).
+
+    Returns a dict with the ``game_ids`` (hex), ``seeds``, ``months_played``,
+    the net worth ``history`` (``months + 1`` rows, one column per game,
+    flat after a game's last logged month), the final ``net_worth`` of every
+    game, the number of records whose event does not match their seed
+    (``mismatched_events``) and the number of records left out because they
+    carry another rules fingerprint (``other_rules``).
+    """
+    rules = rules or game_engine.classic()
+    months = rules.months
+    ours = records["rules"] == rules.fingerprint
+    other_rules = int(len(records) - ours.sum())
+    records = records[ours]
+    keys, column = np.unique(records["game"], return_inverse=True)
+    n_games = len(keys)
+    month = records["month"].astype(np.intp)
+
+    choices = np.full((months, n_games), -1, dtype=np.int8)  # -1: month not played
+    invest = np.zeros((months, n_games))
+    events = np.zeros((months, n_games), dtype=np.intp)
+    seeds = np.zeros(n_games, dtype=np.uint64)
+    in_range = month < months
+    choices[month[in_range], column[in_range]] = records["choice"][in_range]
+    invest[month[in_range], column[in_range]] = records["invest"][in_range]
+    events[month[in_range], column[in_range]] = records["event"][in_range]
+    seeds[column] = records["seed"]
+
+    # Games replay up to their first unplayed month
+    played = choices >= 0
+    months_played = np.where(played.all(axis=0), months, np.argmin(played, axis=0))
+
+    portfolio = game_engine.Portfolios(rules, n_games)
+    history = np.empty((months + 1, n_games))
+    history[0] = portfolio.net_worth
+    for m in range(months):
+        active = m < months_played
+        portfolio.step(np.where(active, choices[m], -1), invest[m], events[m])
+        history[m + 1] = np.where(active, portfolio.net_worth, history[m])
+
+    mismatched = int((records["event"] != rules.event_code(records["seed"], records["month"])).sum())
+    return {
+        # numpy drops trailing NUL bytes of "S" values
+        "game_ids": [uuid.UUID(bytes=key.ljust(16, b"\0")).hex for key in keys.tolist()],
+        "seeds": seeds,
+        "months_played": months_played,
+        "history": history,
+        "net_worth": history[months_played, np.arange(n_games)],
+        "mismatched_events": mismatched,
+        "other_rules": other_rules,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay games from the game event log.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_cmd = commands.add_parser("replay", help="month-by-month replay of one game")
+    replay_cmd.add_argument("log")
+    replay_cmd.add_argument("game_id")
+    replay_cmd.add_argument("--until", type=int, default=None, help="stop after this many months")
+
+    stats_cmd = commands.add_parser("stats", help="replay every game in the log")
+    stats_cmd.add_argument("log", nargs="?", default=DEFAULT_LOG_PATH)
+    for command in (replay_cmd, stats_cmd):
+        command.add_argument("--rules", help="rules file the games were played by (default: the classic game)")
+    args = parser.parse_args(argv)
+
+    rules = game_engine.load(args.rules) if args.rules else game_engine.classic()
+    try:
+        records = read(args.log)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.command == "replay":
+        try:
+            state = replay(records, args.game_id, args.until, rules)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"Game {args.game_id} (seed {state.seed}): {state.month} months")
+        for month, (choice, event) in enumerate(zip(state.choices, state.events), start=1):
+            print(f"  {month:3}  {choice:<7} {event:<16} ₹{state.history[month]:,.2f}")
+        return 0
+
+    start = time.perf_counter()
+    result = replay_all(records, rules)
+    elapsed = time.perf_counter() - start
+    finished = result["months_played"] == rules.months
+    if result["other_rules"]:
+        print(f"{result['other_rules']:,} records played under other rules left out (use --rules)")
+    print(f"{len(records) - result['other_rules']:,} records, {len(result['game_ids']):,} games ({int(finished.sum()):,} finished) "
+          f"replayed in {elapsed * 1000:.1f} ms")
+    if finished.any():
+        final = result["net_worth"][finished]
+        print(f"  finished games: mean ₹{final.mean():,.0f}, median ₹{np.median(final):,.0f}, "
+              f"P(loss) {(final < rules.starting_money).mean():.1%}")
+    if result["mismatched_events"]:
+        print(f"  {result['mismatched_events']:,} records with an event that does not match their seed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Vectorized Monte Carlo simulation of the Financial Journey Game.
+
+Plays N games side by side through ``game_engine``: the portfolios are a
+set of NumPy arrays (one slot per game), every month's market events are
+drawn for all games at once and a strategy decides each month's choice for
+every game in one call. The rules are the classic game's unless a rules
+file is given.
+
+    python game_sim.py --games 1000000 --strategy always-invest-20 --seed 7
+    python game_sim.py --rules game_rules.json --games 100000 --strategy always-buy-stocks
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import game
+import game_engine
+
+DEFAULT_BATCH_SIZE = 250_000
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+def draw_events(rng, n_games, months=game.MONTHS, rules=None):
+    """Event codes for every game and month, drawn in one call."""
+    return (rules or game_engine.classic()).draw_events(rng, n_games, months)
+
+
+# ----- Strategies -----
+# A strategy is called once per month as ``strategy(month, portfolio)`` with
+# the 0-based month and a ``game_engine.Portfolios``, and returns
+# ``(choices, invest_percentage)``: scalars shared by every game or arrays
+# with one entry per game. The ones below use the classic game's choices.
+def always(choice, invest_percentage=game.DEFAULT_INVEST_PERCENTAGE):
+    """Make the same choice every month."""
+    code = game.CHOICES.index(choice)
+    return lambda month, portfolio: (code, invest_percentage)
+
+
+def alternate(*choices, invest_percentage=game.DEFAULT_INVEST_PERCENTAGE):
+    """Cycle through ``choices`` month by month."""
+    codes = [game.CHOICES.index(c) for c in choices]
+    return lambda month, portfolio: (codes[month % len(codes)], invest_percentage)
+
+
+def random_choices(invest_percentage=game.DEFAULT_INVEST_PERCENTAGE, seed=None):
+    """Pick uniformly at random every month, independently for every game."""
+    rng = np.random.default_rng(seed)
+    return lambda month, portfolio: (rng.integers(len(portfolio.rules.choices), size=len(portfolio)),
+                                     invest_percentage)
+
+
+STRATEGIES = {
+    "always-invest-20": always("Invest", 20),
+    "always-invest-50": always("Invest", 50),
+    "always-save": always("Save"),
+    "always-borrow": always("Borrow"),
+    "alternate-save-borrow": alternate("Save", "Borrow"),
+    "alternate-invest-save": alternate("Invest", "Save"),
+    "random": random_choices(),
+}
+
+
+def rules_strategies(rules, seed=None):
+    """``always-<choice>`` for every choice of ``rules``, plus ``random``."""
+    strategies = {f"always-{name.lower().replace(' ', '-')}": (lambda code: lambda month, portfolio: (
+        code, game.DEFAULT_INVEST_PERCENTAGE))(code) for code, name in enumerate(rules.choices)}
+    strategies["random"] = random_choices(seed=seed)
+    return strategies
+
+
+# ----- Simulation -----
+def play(strategy, events, rules=None):
+    """Play one game per column of ``events`` (months x games) and return the Portfolios.
+
+    Feeding the same ``events`` to several strategies compares them on
+    identical market paths (common random numbers).
+    """
+    months, n_games = events.shape
+    portfolio = game_engine.Portfolios(rules or game_engine.classic(), n_games)
+    for month in range(months):
+        choices, invest_percentage = strategy(month, portfolio)
+        portfolio.step(choices, invest_percentage, events[month])
+    return portfolio
+
+
+def simulate(strategy, n_games, seed=None, months=None, batch_size=DEFAULT_BATCH_SIZE, rules=None):
+    """Play ``n_games`` games of ``months`` months (default: the rules' length) with ``strategy``.
+
+    Games are run in batches of ``batch_size`` to bound memory. The same seed
+    always gives the same results. Returns a dict with the final
+    ``net_worth``, ``risk_score`` and ``personality`` code of every game.
+    """
+    rules = rules or game_engine.classic()
+    months = months or rules.months
+    rng = np.random.default_rng(seed)
+    net_worth = np.empty(n_games)
+    risk = np.empty(n_games)
+    personality = np.empty(n_games, dtype=np.int8)
+
+    for start in range(0, n_games, batch_size):
+        stop = min(start + batch_size, n_games)
+        portfolio = play(strategy, draw_events(rng, stop - start, months, rules), rules)
+
+        net_worth[start:stop] = portfolio.net_worth
+        risk[start:stop] = rules.risk_score(portfolio.counts, months)
+        personality[start:stop] = rules.personality_code(portfolio.counts, months)
+
+    return {"net_worth": net_worth, "risk_score": risk, "personality": personality}
+
+
+def summarize(result, percentiles=PERCENTILES, starting_money=game.STARTING_MONEY):
+    """Distribution summary of a ``simulate`` result."""
+    net_worth = result["net_worth"]
+    n_games = len(net_worth)
+    personality_counts = np.bincount(result["personality"], minlength=len(game.PERSONALITIES))
+    return {
+        "games": n_games,
+        "mean": float(net_worth.mean()),
+        "std": float(net_worth.std()),
+        "percentiles": dict(zip(percentiles, np.percentile(net_worth, percentiles).tolist())),
+        "loss_probability": float((net_worth < starting_money).mean()),
+        "personalities": {name: int(c) / n_games for name, c in zip(game.PERSONALITIES, personality_counts)},
+        "risk_score": {"mean": float(result["risk_score"].mean()),
+                       "min": float(result["risk_score"].min()),
+                       "max": float(result["risk_score"].max())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of the Financial Journey Game.")
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--rules", help="rules file (default: the classic game)")
+    parser.add_argument("--strategy", default=None,
+                        help=f"one of {', '.join(sorted(STRATEGIES))} (default always-invest-20); "
+                             f"with --rules always-<choice> or random (the default)")
+    parser.add_argument("--months", type=int, default=None, help="game length (default: the rules')")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    rules = game_engine.load(args.rules) if args.rules else game_engine.classic()
+    strategies = rules_strategies(rules, args.seed) if args.rules else STRATEGIES
+    args.strategy = args.strategy or ("random" if args.rules else "always-invest-20")
+    if args.strategy not in strategies:
+        parser.error(f"--strategy must be one of {', '.join(sorted(strategies))}")
+    months = args.months or rules.months
+
+    start = time.perf_counter()
+    strategy = strategies[args.strategy]
+    if args.strategy == "random":
+        # Reseed the strategy's own generator too so --seed reproduces the run
+        strategy = random_choices(seed=args.seed)
+    summary = summarize(simulate(strategy, args.games, args.seed, months, rules=rules),
+                        starting_money=rules.starting_money)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.strategy}: {summary['games']:,} games x {months} months in {elapsed:.2f}s")
+    print(f"  mean ₹{summary['mean']:,.0f}  std ₹{summary['std']:,.0f}  "
+          f"P(loss) {summary['loss_probability']:.1%}")
+    for p, value in summary["percentiles"].items():
+        print(f"  p{p:<3} ₹{value:,.0f}")
+    for name, share in summary["personalities"].items():
+        print(f"  {name}: {share:.1%}")
+    risk = summary["risk_score"]
+    print(f"  risk score mean {risk['mean']:.1f} (min {risk['min']:.1f}, max {risk['max']:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""End-of-game summary of the Financial Journey Game.
+
+A finished game never changes, so everything its summary screen shows is
+built once per game by ``Summary``: the headline numbers, the
+month-by-month journey as one table (shown with a single virtualized
+``st.dataframe`` rather than one expander per month) and the charts, whose
+event bands are one collection however long the game is. The charts are
+built the first time a rendering mode asks for them and then kept. The app
+keeps summaries in a bounded LRU keyed by game id (``cache``), so a rerun
+of the summary screen is a lookup.
+"""
+import charts
+import game
+import sessions
+
+CACHE_SIZE = 1000  # finished games whose summary is kept
+
+
+def cache(max_games=CACHE_SIZE):
+    """An LRU of ``Summary`` by game id."""
+    return sessions.MemoryStore(max_games)
+
+
+class Summary:
+    """Everything shown once a game is over, computed from its final state."""
+
+    def __init__(self, state):
+        rules = state.rules
+        self.months = state.months
+        self.money = state.money.copy()
+        self.events = state.events
+        self.initial_money, self.final_money = self.money[0], self.money[-1]
+        self.growth = (self.final_money - self.initial_money) / self.initial_money * 100
+        self.decision_counts = state.decision_counts()
+        counts = list(self.decision_counts.values())
+        self.personality = list(game.PERSONALITIES)[rules.personality_code(counts)]
+        self.personality_description = game.PERSONALITIES[self.personality]
+        self.risk_score = float(rules.risk_score(counts))
+        self.journey = self._journey(state)
+        self._charts = {}
+
+    def _journey(self, state):
+        import pandas as pd
+
+        descriptions = state.rules.event_descriptions
+        return pd.DataFrame({
+            "Month": range(self.months + 1),
+            "Net Worth (₹)": self.money,
+            "Decision": ["Starting Point"] + state.choices,
+            "Market Event": ["None"] + self.events,
+            "What Happened": [""] + [descriptions[event] for event in self.events],
+        })
+
+    def chart(self, name, client_side):
+        """The ``"decisions"`` or ``"growth"`` chart: a Plotly figure, or PNG bytes server-side."""
+        key = (name, client_side)
+        if key not in self._charts:
+            if name == "decisions":
+                build = charts.decisions_figure if client_side else charts.decisions_png
+                self._charts[key] = build(self.decision_counts)
+            else:
+                build = charts.growth_figure if client_side else charts.growth_png
+                self._charts[key] = build(self.money, self.events)
+        return self._charts[key]
@@ -0,0 +1,119 @@
+"""Loan Genie: government scheme recommendations.
+
+The scheme catalogue lives in ``schemes.json``. Every scheme has a priority
+and optional eligibility rules: ``occupations`` and ``loan_types`` lists,
+and inclusive ``min_``/``max_`` bounds on age, income and credit score. A
+missing rule matches everyone.
+
+Loading the catalogue compiles the rules into a lookup table indexed by
+(occupation, loan type, age band, income band, credit band), where the
+bands are cut at the bounds the catalogue uses. Each cell holds the
+``TOP_K`` eligible schemes, highest priority first, ties in catalogue
+order. Recommending is then a table lookup, for one applicant or for a
+whole array of them, and always gives the same answer for the same inputs.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+import scoring
+
+CATALOGUE_PATH = Path(__file__).with_name("schemes.json")
+OCCUPATIONS = ["Salaried", "Entrepreneur", "Farmer", "Student", "Retired"]
+LOAN_TYPES = list(scoring.LOAN_TYPE_MAP)
+TOP_K = 3
+
+# Numeric eligibility rules: (applicant field, catalogue key prefix)
+RANGES = [("age", "age"), ("income", "income"), ("credit_score", "credit")]
+
+
+def _codes(values, vocabulary):
+    """Index of each label in ``vocabulary``; unknown labels get ``len(vocabulary)``."""
+    values = np.asarray(values)
+    codes = np.full(values.shape, len(vocabulary), dtype=np.intp)
+    for code, label in enumerate(vocabulary):
+        codes[values == label] = code
+    return codes
+
+
+def _category_rules(schemes, key, vocabulary):
+    """Eligibility per (label, scheme); the extra last label stands for unknown values."""
+    ok = np.zeros((len(vocabulary) + 1, len(schemes)), dtype=bool)
+    for j, scheme in enumerate(schemes):
+        allowed = scheme.get(key)
+        if allowed is None:
+            ok[:, j] = True
+        else:
+            ok[[vocabulary.index(label) for label in allowed], j] = True
+    return ok
+
+
+def _range_rules(schemes, prefix):
+    """(band edges, eligibility per (band, scheme)) for inclusive min/max bounds."""
+    lows = np.array([scheme.get(f"min_{prefix}", -np.inf) for scheme in schemes], dtype=float)
+    highs = np.array([scheme.get(f"max_{prefix}", np.inf) for scheme in schemes], dtype=float)
+    # A value is in band b when edges[b - 1] <= value < edges[b]; the upper
+    # bounds are inclusive, so their band ends just above them
+    edges = np.unique(np.concatenate([lows, np.nextafter(highs, np.inf)]))
+    edges = edges[np.isfinite(edges)]
+    # Every band is decided by its lowest value
+    band_floor = np.concatenate([[-np.inf], edges])
+    ok = (lows[None, :] <= band_floor[:, None]) & (band_floor[:, None] <= highs[None, :])
+    return edges, ok
+
+
+class Catalogue:
+    """Schemes plus the precomputed top-``TOP_K`` table."""
+
+    def __init__(self, schemes, top_k=TOP_K):
+        self.names = np.array([scheme["name"] for scheme in schemes], dtype=object)
+        self.top_k = top_k
+
+        occupation_ok = _category_rules(schemes, "occupations", OCCUPATIONS)
+        loan_type_ok = _category_rules(schemes, "loan_types", LOAN_TYPES)
+        self.edges = {}
+        range_ok = []
+        for field, prefix in RANGES:
+            self.edges[field], ok = _range_rules(schemes, prefix)
+            range_ok.append(ok)
+
+        # Eligibility over every cell, schemes best first along the last axis
+        order = np.lexsort((np.arange(len(schemes)), [-scheme.get("priority", 0) for scheme in schemes]))
+        age_ok, income_ok, credit_ok = (ok[:, order] for ok in range_ok)
+        eligible = (occupation_ok[:, order][:, None, None, None, None, :]
+                    & loan_type_ok[:, order][None, :, None, None, None, :]
+                    & age_ok[None, None, :, None, None, :]
+                    & income_ok[None, None, None, :, None, :]
+                    & credit_ok[None, None, None, None, :, :])
+
+        # First top_k eligible schemes of every cell; -1 pads cells with fewer
+        first = np.argsort(~eligible, axis=-1, kind="stable")[..., :top_k]
+        found = np.take_along_axis(eligible, first, axis=-1)
+        self.table = np.where(found, order[first], -1).astype(np.int16)
+
+    def lookup(self, occupation, loan_type, age, income, credit_score):
+        """Scheme indexes shaped ``(..., top_k)``, -1 where fewer schemes match.
+
+        Every argument is a scalar or an array; arrays broadcast together.
+        """
+        index = [_codes(occupation, OCCUPATIONS), _codes(loan_type, LOAN_TYPES)]
+        for field, value in zip(self.edges, (age, income, credit_score)):
+            index.append(np.searchsorted(self.edges[field], value, side="right"))
+        return self.table[tuple(np.broadcast_arrays(*index))]
+
+    def recommend(self, occupation, loan_type, age, income, credit_score):
+        """Names of the schemes recommended to one applicant, best first."""
+        codes = self.lookup(occupation, loan_type, age, income, credit_score)
+        return [self.names[code] for code in codes if code >= 0]
+
+    def recommend_batch(self, occupation, loan_type, age, income, credit_score):
+        """Recommended scheme names for every applicant, as a list of lists."""
+        codes = self.lookup(occupation, loan_type, age, income, credit_score)
+        names = np.append(self.names, None)  # code -1 picks the trailing None
+        return [[name for name in row if name is not None] for row in names[codes].tolist()]
+
+
+def load(path=CATALOGUE_PATH, top_k=TOP_K):
+    with open(path, encoding="utf-8") as f:
+        return Catalogue(json.load(f)["schemes"], top_k)
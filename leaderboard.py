@@ -0,0 +1,261 @@
+"""Leaderboard and cohort analytics over completed Financial Journey games.
+
+Every finished game's summary is kept in a SQLite file on local disk
+(``results.db`` by default, or ``LOAN_RESULTS_DB`` in the app): final net
+worth, growth, risk score, personality and event luck (``Rules.event_luck``
+in ``game_engine``: how much more the game's market events grew a fixed
+reference strategy than average events would have, in growth %).
+The luck-adjusted score is the growth with the luck taken out, so players
+who were handed a run of bull markets do not top every board.
+
+The view never rescans the games:
+
+- the top-N boards read the first rows of an index on the ranked column;
+- triggers fold every new game into per-personality totals and a growth
+  histogram (``GROWTH_BIN_WIDTH`` wide bins), from which the cohort table
+  and its percentiles are computed.
+
+So a page load costs the same at a thousand games as at millions.
+
+    python leaderboard.py results.db
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+
+import game
+import game_engine
+
+DEFAULT_DB_PATH = "results.db"
+DEFAULT_LIMIT = 10
+GROWTH_BIN_WIDTH = 10  # percentage points
+GROWTH_MIN, GROWTH_MAX = -100, 2000  # growth below/above lands in the first/last bin
+COHORT_PERCENTILES = (10, 50, 90)
+
+RESULT_COLUMNS = ["game_id", "rules", "finished", "final_net_worth", "growth", "risk_score", "personality", "luck",
+                  "adjusted_score"]
+# growth: % change of net worth over the game. luck: Rules.event_luck, the
+# growth (%) the game's events gave the reference strategy above its
+# expected growth. adjusted_score: growth - luck, both in growth %.
+SCHEMA_VERSION = 2  # PRAGMA user_version; 2: luck in growth % of the reference strategy
+BOARDS = {"final_net_worth": "Top Net Worth", "adjusted_score": "Top Luck-Adjusted Score"}
+
+_LAST_BIN = (GROWTH_MAX - GROWTH_MIN) // GROWTH_BIN_WIDTH
+_BIN_SQL = (f"MAX(0, MIN({_LAST_BIN}, CAST(({{row}}.growth - {GROWTH_MIN}) / {GROWTH_BIN_WIDTH} AS INTEGER)))")
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    game_id TEXT PRIMARY KEY,
+    rules INTEGER NOT NULL,
+    finished REAL NOT NULL,
+    final_net_worth REAL NOT NULL,
+    growth REAL NOT NULL,
+    risk_score REAL NOT NULL,
+    personality INTEGER NOT NULL,
+    luck REAL NOT NULL,
+    adjusted_score REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_rules_net_worth ON results (rules, final_net_worth DESC);
+CREATE INDEX IF NOT EXISTS results_by_rules_adjusted_score ON results (rules, adjusted_score DESC);
+
+CREATE TABLE IF NOT EXISTS cohorts (
+    rules INTEGER NOT NULL,
+    personality INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    growth_sum REAL NOT NULL,
+    growth_sq_sum REAL NOT NULL,
+    luck_sum REAL NOT NULL,
+    PRIMARY KEY (rules, personality)
+);
+CREATE TABLE IF NOT EXISTS growth_bins (
+    rules INTEGER NOT NULL,
+    personality INTEGER NOT NULL,
+    bin INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    PRIMARY KEY (rules, personality, bin)
+);
+
+-- Only rows actually inserted fire this (INSERT OR IGNORE skips repeats)
+CREATE TRIGGER IF NOT EXISTS results_aggregate AFTER INSERT ON results BEGIN
+    INSERT INTO cohorts (rules, personality, games, growth_sum, growth_sq_sum, luck_sum)
+    VALUES (NEW.rules, NEW.personality, 1, NEW.growth, NEW.growth * NEW.growth, NEW.luck)
+    ON CONFLICT (rules, personality) DO UPDATE SET
+        games = games + 1,
+        growth_sum = growth_sum + excluded.growth_sum,
+        growth_sq_sum = growth_sq_sum + excluded.growth_sq_sum,
+        luck_sum = luck_sum + excluded.luck_sum;
+    INSERT INTO growth_bins (rules, personality, bin, games)
+    VALUES (NEW.rules, NEW.personality, {_BIN_SQL.format(row="NEW")}, 1)
+    ON CONFLICT (rules, personality, bin) DO UPDATE SET games = games + 1;
+END;
+"""
+
+# A results.db from an older SCHEMA_VERSION cannot be rescored (the events
+# are not stored), so its games are kept under fingerprint 0, which no rule
+# set has, and the aggregates rebuilt without them
+_RETIRE_OLD_RESULTS = f"""
+UPDATE results SET rules = 0;
+DELETE FROM cohorts;
+DELETE FROM growth_bins;
+INSERT INTO cohorts (rules, personality, games, growth_sum, growth_sq_sum, luck_sum)
+SELECT rules, personality, COUNT(*), SUM(growth), SUM(growth * growth), SUM(luck)
+FROM results GROUP BY rules, personality;
+INSERT INTO growth_bins (rules, personality, bin, games)
+SELECT rules, personality, {_BIN_SQL.format(row="results")} AS b, COUNT(*)
+FROM results GROUP BY rules, personality, b;
+"""
+# Before rows carried a rules fingerprint
+_MIGRATE_UNSTAMPED = """
+ALTER TABLE results ADD COLUMN rules INTEGER NOT NULL DEFAULT 0;
+DROP INDEX IF EXISTS results_by_net_worth;
+DROP INDEX IF EXISTS results_by_adjusted_score;
+DROP TRIGGER IF EXISTS results_aggregate;
+DROP TABLE IF EXISTS cohorts;
+DROP TABLE IF EXISTS growth_bins;
+"""
+
+
+def game_result(game_id, state, finished=None):
+    """The ``RESULT_COLUMNS`` row of a finished ``game_engine.GameState``."""
+    rules, counts = state.rules, state.portfolio.counts[:, 0]
+    growth = (state.money[-1] - state.money[0]) / state.money[0] * 100
+    luck = rules.event_luck(state.codes[1, :state.month])
+    return (
+        game_id,
+        rules.fingerprint,
+        time.time() if finished is None else finished,
+        float(state.money[-1]),
+        float(growth),
+        float(rules.risk_score(counts)),
+        rules.personality_code(counts),
+        float(luck),
+        float(growth - luck),
+    )
+
+
+class ResultStore:
+    """Completed-game summaries plus their incrementally maintained aggregates.
+
+    Games of every rule set are stored; the boards, cohorts and count are
+    those of ``rules`` (default: the classic game) only.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, rules=None):
+        self.path = path
+        self.fingerprint = (rules or game_engine.classic()).fingerprint
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(results)")]
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        script = _SCHEMA
+        if columns and version < SCHEMA_VERSION:
+            script = (_MIGRATE_UNSTAMPED if "rules" not in columns else "") + _SCHEMA + _RETIRE_OLD_RESULTS
+        self._conn.executescript(f"BEGIN; {script} PRAGMA user_version = {SCHEMA_VERSION}; COMMIT;")
+
+    def record(self, game_id, state):
+        """Store a finished game once; returns False if it was already stored."""
+        return self.record_many([game_result(game_id, state)]) == 1
+
+    def record_many(self, rows):
+        """Insert ``RESULT_COLUMNS`` rows in one transaction; returns how many were new."""
+        placeholders = ", ".join("?" * len(RESULT_COLUMNS))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                # rowcount counts the rows inserted, not the trigger's updates
+                inserted = self._conn.executemany(
+                    f"INSERT OR IGNORE INTO results ({', '.join(RESULT_COLUMNS)}) VALUES ({placeholders})",
+                    rows).rowcount
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return inserted
+
+    def top(self, by="final_net_worth", limit=DEFAULT_LIMIT):
+        """The best ``limit`` games by ``by`` (a key of ``BOARDS``), best first."""
+        if by not in BOARDS:
+            raise ValueError(f"Unknown leaderboard: {by!r}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(RESULT_COLUMNS)} FROM results WHERE rules = ? ORDER BY {by} DESC LIMIT ?",
+                (self.fingerprint, limit)).fetchall()
+        return [dict(zip(RESULT_COLUMNS, row)) for row in rows]
+
+    def cohorts(self, percentiles=COHORT_PERCENTILES):
+        """Growth distribution and mean luck of every personality, from the aggregates.
+
+        Percentiles are read off the growth histogram, so they are accurate
+        to ``GROWTH_BIN_WIDTH`` (the bin's midpoint is reported).
+        """
+        with self._lock:
+            totals = self._conn.execute(
+                "SELECT personality, games, growth_sum, growth_sq_sum, luck_sum FROM cohorts WHERE rules = ? "
+                "ORDER BY personality", (self.fingerprint,)).fetchall()
+            bins = self._conn.execute("SELECT personality, bin, games FROM growth_bins WHERE rules = ?",
+                                      (self.fingerprint,)).fetchall()
+
+        histogram = np.zeros((len(game.PERSONALITIES), _LAST_BIN + 1))
+        for personality, b, n in bins:
+            histogram[personality, b] = n
+        midpoints = GROWTH_MIN + (np.arange(_LAST_BIN + 1) + 0.5) * GROWTH_BIN_WIDTH
+
+        cohorts = []
+        for personality, n, growth_sum, growth_sq_sum, luck_sum in totals:
+            mean = growth_sum / n
+            cumulative = np.cumsum(histogram[personality])
+            cohort = {
+                "personality": list(game.PERSONALITIES)[personality],
+                "games": n,
+                "mean_growth": mean,
+                "std_growth": max(growth_sq_sum / n - mean * mean, 0.0) ** 0.5,
+                "mean_luck": luck_sum / n,
+            }
+            for p in percentiles:
+                cohort[f"p{p}_growth"] = float(midpoints[np.searchsorted(cumulative, p / 100 * n)])
+            cohorts.append(cohort)
+        return cohorts
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(games), 0) FROM cohorts WHERE rules = ?",
+                                      (self.fingerprint,)).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the Financial Journey leaderboard.")
+    parser.add_argument("db", nargs="?", default=DEFAULT_DB_PATH)
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--rules", help="show the games played by this rules file (default: the classic game)")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.db, game_engine.load(args.rules) if args.rules else None)
+    start = time.perf_counter()
+    boards = {by: store.top(by, args.limit) for by in BOARDS}
+    cohorts = store.cohorts()
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(store):,} completed games (queried in {elapsed * 1000:.1f} ms)")
+    for by, title in BOARDS.items():
+        print(f"\n{title}")
+        for rank, row in enumerate(boards[by], start=1):
+            print(f"  {rank:3}. ₹{row['final_net_worth']:>14,.0f}  growth {row['growth']:+8.1f}%  "
+                  f"luck {row['luck']:+7.1f}  adjusted {row['adjusted_score']:+8.1f}")
+    print(f"\n{'personality':<22} {'games':>9} {'mean %':>8} {'p10 %':>8} {'p50 %':>8} {'p90 %':>8} {'luck':>7}")
+    for c in cohorts:
+        print(f"{c['personality']:<22} {c['games']:9,} {c['mean_growth']:8.1f} {c['p10_growth']:8.0f} "
+              f"{c['p50_growth']:8.0f} {c['p90_growth']:8.0f} {c['mean_luck']:+7.1f}")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Search for the best monthly Invest/Save/Borrow policy in the Financial Journey Game.
+
+Candidate policies are scored by simulation with ``game_sim``. To keep that
+affordable:
+
+- every candidate plays the same market paths (common random numbers), so
+  differences between policies are not drowned in event noise;
+- the search runs in stages of growing game counts and drops, after each
+  stage, every policy that is clearly worse than the current leader on the
+  same games (successive halving with a paired confidence test);
+- candidates are spread over a process pool, each worker drawing the shared
+  event paths once from the seed.
+
+    python optimizer.py --games 100000 --workers 4 --objective loss-averse
+    python optimizer.py --scaling
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import game
+import game_sim
+
+DEFAULT_STAGE_GAMES = (2_000, 8_000, 32_000, 128_000)
+DEFAULT_CONFIDENCE_Z = 3.0  # how many standard errors count as "clearly worse"
+LOSS_AVERSION = 2.0         # extra weight on every rupee below the starting money
+
+
+# ----- Policies -----
+# Policies are small picklable classes so they can be shipped to worker
+# processes; each is a game_sim strategy: policy(month, portfolio).
+class FixedPolicy:
+    """The same choice every month."""
+
+    def __init__(self, choice, invest_percentage=game.DEFAULT_INVEST_PERCENTAGE):
+        self.code = game.CHOICES.index(choice)
+        self.invest_percentage = invest_percentage
+
+    def __call__(self, month, portfolio):
+        return self.code, self.invest_percentage
+
+    def __repr__(self):
+        if self.code == game.INVEST:
+            return f"always Invest {self.invest_percentage}%"
+        return f"always {game.CHOICES[self.code]}"
+
+
+class ThresholdPolicy:
+    """Decide from the current portfolio of each game.
+
+    Borrow while savings are below ``savings_floor`` and outstanding loans are
+    at most ``loan_limit``, invest ``invest_percentage`` while savings are at
+    or above ``savings_floor``, otherwise save.
+    """
+
+    def __init__(self, savings_floor, loan_limit, invest_percentage):
+        self.savings_floor = savings_floor
+        self.loan_limit = loan_limit
+        self.invest_percentage = invest_percentage
+
+    def __call__(self, month, portfolio):
+        rich = portfolio.savings >= self.savings_floor
+        can_borrow = portfolio.loan <= self.loan_limit
+        choices = np.where(rich, game.INVEST, np.where(can_borrow, game.BORROW, game.SAVE))
+        return choices, self.invest_percentage
+
+    def __repr__(self):
+        return (f"invest {self.invest_percentage}% when savings >= ₹{self.savings_floor:,}, "
+                f"borrow below that while loans <= ₹{self.loan_limit:,}, else save")
+
+
+class SequencePolicy:
+    """A fixed choice for each month of the game."""
+
+    def __init__(self, choices, invest_percentage=game.DEFAULT_INVEST_PERCENTAGE, label=None):
+        self.codes = [game.CHOICES.index(c) for c in choices]
+        self.invest_percentage = invest_percentage
+        self.label = label
+
+    def __call__(self, month, portfolio):
+        return self.codes[month], self.invest_percentage
+
+    def __repr__(self):
+        if self.label:
+            return self.label
+        return "sequence " + "".join(game.CHOICES[c][0] for c in self.codes)
+
+
+def candidate_policies(months=game.MONTHS, random_sequences=32, seed=0):
+    """The default search space: fixed, state-dependent and per-month sequence policies."""
+    candidates = [FixedPolicy("Invest", pct) for pct in range(10, 101, 10)]
+    candidates += [FixedPolicy("Save"), FixedPolicy("Borrow")]
+
+    for savings_floor in (25_000, 50_000, 100_000, 150_000):
+        for loan_limit in (0, 10_000, 30_000):
+            for pct in (20, 50, 100):
+                candidates.append(ThresholdPolicy(savings_floor, loan_limit, pct))
+
+    for k in range(4, months, 4):
+        candidates.append(SequencePolicy(["Invest"] * k + ["Save"] * (months - k), 50,
+                                         label=f"invest 50% for {k} months, then save"))
+        candidates.append(SequencePolicy(["Save"] * k + ["Invest"] * (months - k), 50,
+                                         label=f"save for {k} months, then invest 50%"))
+
+    rng = np.random.default_rng(seed)
+    for _ in range(random_sequences):
+        codes = rng.integers(len(game.CHOICES), size=months)
+        candidates.append(SequencePolicy([game.CHOICES[c] for c in codes], int(rng.integers(1, 11)) * 10))
+    return candidates
+
+
+# ----- Objectives -----
+def objective_values(net_worth, objective):
+    """Per-game score to maximise; the policy's score is its mean."""
+    if objective == "mean":
+        return net_worth
+    if objective == "loss-averse":
+        return net_worth - LOSS_AVERSION * np.maximum(game.STARTING_MONEY - net_worth, 0)
+    raise ValueError(f"Unknown objective: {objective!r}")
+
+
+OBJECTIVES = ("mean", "loss-averse")
+
+
+# ----- Evaluation -----
+_events = None  # shared market paths of this process, see _init_events
+
+
+def _init_events(seed, n_games, months):
+    global _events
+    _events = game_sim.draw_events(np.random.default_rng(seed), n_games, months)
+
+
+def _evaluate(policy, n_games, objective):
+    """Per-game objective of ``policy`` on the first ``n_games`` shared paths."""
+    portfolio = game_sim.play(policy, _events[:, :n_games])
+    return objective_values(portfolio.net_worth, objective)
+
+
+def search(candidates, stage_games=DEFAULT_STAGE_GAMES, objective="mean", seed=0,
+           months=game.MONTHS, workers=1, z=DEFAULT_CONFIDENCE_Z):
+    """Successive-halving search over ``candidates``.
+
+    Returns ``(ranking, history)``: the surviving policies as
+    ``(policy, mean score, standard error)`` sorted best first, and the number
+    of candidates evaluated at each stage.
+    """
+    max_games = max(stage_games)
+    alive = list(candidates)
+    history = []
+    ranking = []
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_events,
+                                   initargs=(seed, max_games, months))
+    else:
+        _init_events(seed, max_games, months)
+
+    try:
+        for n_games in stage_games:
+            history.append((n_games, len(alive)))
+            if pool is None:
+                scores = [_evaluate(policy, n_games, objective) for policy in alive]
+            else:
+                scores = list(pool.map(_evaluate, alive, [n_games] * len(alive), [objective] * len(alive),
+                                       chunksize=max(1, len(alive) // (workers * 4))))
+
+            means = np.array([s.mean() for s in scores])
+            leader = scores[int(means.argmax())]
+
+            # Paired test against the leader on the same games: drop a policy
+            # when even its optimistic difference to the leader is negative
+            keep = []
+            for policy, s, mean in zip(alive, scores, means):
+                diff = s - leader
+                stderr = diff.std(ddof=1) / np.sqrt(n_games)
+                if diff.mean() + z * stderr >= 0:
+                    keep.append((policy, mean, s.std(ddof=1) / np.sqrt(n_games)))
+
+            ranking = sorted(keep, key=lambda item: item[1], reverse=True)
+            alive = [policy for policy, _, _ in ranking]
+            if len(alive) == 1:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return ranking, history
+
+
+def scaling(candidates, stage_games, objective, seed, max_workers):
+    """Wall-clock of the same search for 1, 2, 4, ... workers."""
+    timings = []
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        search(candidates, stage_games, objective, seed, workers=workers)
+        timings.append((workers, time.perf_counter() - start))
+        workers *= 2
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search Invest/Save/Borrow policies for the Financial Journey Game.")
+    parser.add_argument("--games", type=int, default=max(DEFAULT_STAGE_GAMES),
+                        help="games in the final stage; earlier stages use 1/4, 1/16 and 1/64 of it")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="mean")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=5, help="how many surviving policies to list")
+    parser.add_argument("--scaling", action="store_true",
+                        help="time the search with 1, 2, 4, ... workers up to the CPU count")
+    args = parser.parse_args(argv)
+
+    stage_games = tuple(max(args.games // 4 ** k, 100) for k in (3, 2, 1, 0))
+    candidates = candidate_policies(seed=args.seed)
+
+    if args.scaling:
+        cpus = os.cpu_count() or 1
+        print(f"{len(candidates)} candidates, stages {stage_games}, {cpus} CPUs")
+        timings = scaling(candidates, stage_games, args.objective, args.seed, cpus)
+        base = timings[0][1]
+        for workers, elapsed in timings:
+            print(f"  {workers:>3} workers: {elapsed:6.2f}s  (x{base / elapsed:.2f})")
+        return 0
+
+    start = time.perf_counter()
+    ranking, history = search(candidates, stage_games, args.objective, args.seed, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"Searched {len(candidates)} policies in {elapsed:.2f}s with {args.workers} worker(s)")
+    for n_games, count in history:
+        print(f"  {count:>3} policies x {n_games:,} games")
+
+    print(f"\nTop policies ({args.objective}):")
+    for policy, mean, stderr in ranking[:args.top]:
+        print(f"  ₹{mean:,.0f} ± {stderr:,.0f}  {policy!r}")
+
+    # Distribution of the winner on the full set of shared paths
+    best = ranking[0][0]
+    events = game_sim.draw_events(np.random.default_rng(args.seed), stage_games[-1])
+    portfolio = game_sim.play(best, events)
+    invest_months, save_months, borrow_months = portfolio.counts
+    summary = game_sim.summarize({
+        "net_worth": portfolio.net_worth,
+        "risk_score": game.risk_score(invest_months, borrow_months),
+        "personality": game.personality_code(invest_months, save_months, borrow_months),
+    })
+    print(f"\nBest: {best!r}")
+    print(f"  mean ₹{summary['mean']:,.0f}  std ₹{summary['std']:,.0f}  P(loss) {summary['loss_probability']:.1%}")
+    for p, value in summary["percentiles"].items():
+        print(f"  p{p:<3} ₹{value:,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Opt-in per-rerun profiling of loan.py.
+
+Enabled with the ``LOAN_PROFILE=1`` environment variable (every session) or
+the ``?profile=1`` query parameter (one session). Each rerun is split into
+timing spans:
+
+- ``section(name)`` marks the start of a top-level section of the script; it
+  runs until the next section or the end of the rerun, so sections follow
+  the ``# ----- ... -----`` blocks of loan.py without re-indenting them;
+- ``span(name)`` times the block inside it, nested in the current section
+  (``render.panel`` opens one per chart panel);
+- ``fragment`` wraps an ``st.fragment`` function so its reruns are
+  profiled too.
+
+Every span records wall time, net allocated and peak memory (tracemalloc)
+and the chart figures still in memory when it ends. ``end_rerun`` shows the
+spans in a sidebar debug panel and appends the rerun as one JSON line to
+``LOAN_PROFILE_LOG`` (``profile.jsonl``); ``python profiling.py`` aggregates
+that log.
+
+When profiling is off, ``section`` and ``span`` cost one thread-local
+lookup. tracemalloc runs only while at least one profiled rerun is active;
+it traces the whole process, so concurrent sessions inflate each other's
+allocation numbers. A rerun that never reaches ``end_rerun`` (an exception,
+``st.stop()``, ``st.rerun()`` as the session's last run) still lets go of
+tracemalloc: its state lives in the script thread, and is released when
+that thread ends even if no later rerun comes to finish it.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+from contextlib import contextmanager
+
+PROFILE_ENV = os.environ.get("LOAN_PROFILE", "") not in ("", "0")
+LOG_PATH = os.environ.get("LOAN_PROFILE_LOG", "profile.jsonl")
+
+_local = threading.local()
+_lock = threading.Lock()
+_active = 0  # profiled reruns in progress; tracemalloc runs while > 0
+_started_tracing = False
+
+
+class _Rerun:
+    """Spans of one profiled rerun."""
+
+    def __init__(self, session, fragment=None):
+        _start_tracing()
+        # Released by _finish, or when the rerun is dropped unfinished with its thread
+        self.release = weakref.finalize(self, _stop_tracing)
+        self.session = session
+        self.fragment = fragment
+        self.start = time.perf_counter()
+        self.start_memory = tracemalloc.get_traced_memory()[0]
+        self.spans = []   # finished spans, in start order
+        self.stack = []   # open spans, innermost last
+        self.section = None
+
+    def open(self, name):
+        current, peak = tracemalloc.get_traced_memory()
+        if self.stack:
+            self.stack[-1]["peak"] = max(self.stack[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+        frame = {"name": name, "depth": len(self.stack), "start": time.perf_counter(),
+                 "memory": current, "peak": current}
+        frame["index"] = len(self.spans)
+        self.spans.append(None)  # keep start order; filled in on close
+        self.stack.append(frame)
+        return frame
+
+    def close(self, frame):
+        current, peak = tracemalloc.get_traced_memory()
+        self.stack.remove(frame)
+        frame["peak"] = max(frame["peak"], peak)
+        if self.stack:
+            self.stack[-1]["peak"] = max(self.stack[-1]["peak"], frame["peak"])
+        tracemalloc.reset_peak()
+        self.spans[frame["index"]] = {
+            "name": frame["name"],
+            "depth": frame["depth"],
+            "ms": round((time.perf_counter() - frame["start"]) * 1000, 3),
+            "alloc_kb": round((current - frame["memory"]) / 1024, 1),
+            "peak_kb": round((frame["peak"] - frame["memory"]) / 1024, 1),
+            "figures": _resident_figures(),
+        }
+
+    def record(self, interrupted=False):
+        while self.stack:
+            self.close(self.stack[-1])
+        return {
+            "ts": round(time.time(), 3),
+            "session": self.session,
+            "fragment": self.fragment,
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "alloc_kb": round((tracemalloc.get_traced_memory()[0] - self.start_memory) / 1024, 1),
+            "figures": _resident_figures(),
+            "interrupted": interrupted,
+            "spans": [s for s in self.spans if s is not None],
+        }
+
+
+def _resident_figures():
+    import render
+
+    return render.resident_figures()
+
+
+def _start_tracing():
+    global _active, _started_tracing
+    with _lock:
+        _active += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+
+
+def _stop_tracing():
+    global _active, _started_tracing
+    with _lock:
+        _active -= 1
+        if _active == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def _write(record):
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _lock:
+        with open(LOG_PATH, "a", encoding="utf-8") as log:
+            log.write(line)
+
+
+def _finish(interrupted=False):
+    run = _local.run
+    record = run.record(interrupted)
+    _local.run = None
+    run.release()
+    _write(record)
+    return record
+
+
+def enabled():
+    import streamlit as st
+
+    return PROFILE_ENV or st.query_params.get("profile", "") not in ("", "0")
+
+
+def begin_rerun(fragment=None):
+    """Start profiling this rerun if profiling is on for the session."""
+    import streamlit as st
+
+    if getattr(_local, "run", None) is not None:
+        # The previous rerun was cut short by st.rerun() or st.stop()
+        _finish(interrupted=True)
+    if not enabled():
+        _local.run = None
+        return
+    session = st.session_state.setdefault("profile_session", uuid.uuid4().hex[:8])
+    _local.run = _Rerun(session, fragment)
+
+
+def section(name):
+    """Close the current top-level section and open ``name``."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return
+    if run.section is not None:
+        run.close(run.section)
+    run.section = run.open(name)
+
+
+@contextmanager
+def span(name):
+    """Time the block inside the current section."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        yield
+        return
+    frame = run.open(name)
+    try:
+        yield
+    finally:
+        run.close(frame)
+
+
+def fragment(func):
+    """Profile the reruns of an ``st.fragment`` that happen without the rest of the page.
+
+    Apply under ``@st.fragment``. During a full rerun the function is simply
+    part of that rerun; rerun on its own it is logged as a separate record
+    with ``"fragment"`` set (fragments cannot write to the sidebar, so these
+    only go to the log).
+    """
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        if getattr(_local, "run", None) is not None:
+            return func(*args, **kwargs)
+        begin_rerun(fragment=func.__name__)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if getattr(_local, "run", None) is not None:
+                _finish()
+    return run
+
+
+def end_rerun():
+    """Finish the rerun: log it and show the spans in the sidebar."""
+    if getattr(_local, "run", None) is None:
+        return
+    import streamlit as st
+
+    record = _finish()
+    with st.sidebar.expander("🔬 Profile"):
+        st.caption(f"Rerun: {record['total_ms']:.0f} ms · {record['alloc_kb']:+,.0f} KB · "
+                   f"{record['figures']} figures in memory · log: {LOG_PATH}")
+        for s in record["spans"]:
+            indent = " " * s["depth"]
+            st.caption(f"{indent}{s['name']}: {s['ms']:.1f} ms · {s['alloc_kb']:+,.0f} KB "
+                       f"(peak {s['peak_kb']:,.0f} KB) · {s['figures']} figs")
+
+
+# ----- Log Aggregation -----
+def summarize(path=LOG_PATH):
+    """Per-span call count, p50/p95 wall time and mean allocation over a profile log."""
+    import numpy as np
+
+    by_span = {}
+    totals = []
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            record = json.loads(line)
+            totals.append(record["total_ms"])
+            for s in record["spans"]:
+                by_span.setdefault(s["name"], []).append((s["ms"], s["alloc_kb"]))
+    summary = {"rerun": {"calls": len(totals), "p50_ms": float(np.percentile(totals, 50)),
+                         "p95_ms": float(np.percentile(totals, 95)), "alloc_kb": None}}
+    for name, samples in by_span.items():
+        ms, alloc = np.array(samples).T
+        summary[name] = {"calls": len(ms), "p50_ms": float(np.percentile(ms, 50)),
+                         "p95_ms": float(np.percentile(ms, 95)), "alloc_kb": float(alloc.mean())}
+    return summary
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Aggregate a loan.py profile log.")
+    parser.add_argument("log", nargs="?", default=LOG_PATH)
+    args = parser.parse_args(argv)
+
+    print(f"{'span':<20} {'calls':>7} {'p50 ms':>10} {'p95 ms':>10} {'alloc KB':>10}")
+    for name, row in sorted(summarize(args.log).items(), key=lambda item: -item[1]["p95_ms"]):
+        alloc = "" if row["alloc_kb"] is None else f"{row['alloc_kb']:10,.0f}"
+        print(f"{name:<20} {row['calls']:7} {row['p50_ms']:10.1f} {row['p95_ms']:10.1f} {alloc:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+"""Chart rendering mode and per-panel render stats for loan.py.
+
+Two rendering modes are supported:
+
+- ``server`` (default): matplotlib/seaborn images rasterized on the server,
+  as the app has always done;
+- ``client``: the chart data is sent to the browser as Plotly figures and
+  nothing is rasterized server-side.
+
+The mode comes from the ``render`` query parameter (``?render=client``) or
+the ``LOAN_RENDER_MODE`` environment variable.
+
+In server mode the PNGs of independent panels are built concurrently with
+``prefetch`` (``LOAN_PANEL_WORKERS`` threads), while the panels are still
+written to the page in their usual order.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import streamlit as st
+
+import profiling
+
+RENDER_MODES = ("server", "client")
+DEFAULT_RENDER_MODE = os.environ.get("LOAN_RENDER_MODE", "server")
+PANEL_WORKERS = int(os.environ.get("LOAN_PANEL_WORKERS", min(4, os.cpu_count() or 1)))
+
+_executor = ThreadPoolExecutor(max(PANEL_WORKERS, 1), thread_name_prefix="panel")
+
+
+def render_mode():
+    mode = st.query_params.get("render", DEFAULT_RENDER_MODE)
+    return mode if mode in RENDER_MODES else "server"
+
+
+def client_side():
+    return render_mode() == "client"
+
+
+def resident_figures():
+    """Number of chart figures still in memory in this process (0 before any is drawn)."""
+    charts = sys.modules.get("charts")
+    return charts.resident_figures() if charts is not None else 0
+
+
+def prefetch(**jobs):
+    """Start ``name=(func, *args)`` jobs in the panel pool; returns ``{name: Future}``.
+
+    The jobs must not call Streamlit: they run outside the script thread.
+    Read the results with ``.result()`` where each panel is drawn.
+    """
+    import charts
+
+    charts.preload()
+    return {name: _executor.submit(*job) for name, job in jobs.items()}
+
+
+@contextmanager
+def panel(name):
+    """Time the panel rendered inside the block into this session's render stats."""
+    start = time.perf_counter()
+    try:
+        with profiling.span(name):
+            yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats = st.session_state.setdefault("render_stats", {})
+        entry = stats.setdefault(name, {"renders": 0, "last_ms": 0.0, "total_ms": 0.0})
+        entry["renders"] += 1
+        entry["last_ms"] = elapsed_ms
+        entry["total_ms"] += elapsed_ms
+
+        figures = resident_figures()
+        st.session_state["peak_figures"] = max(st.session_state.get("peak_figures", 0), figures)
+
+
+def show_stats():
+    """Sidebar expander with the render stats of this session."""
+    with st.sidebar.expander("⏱️ Render Stats"):
+        st.caption(f"Mode: {render_mode()} · resident figures: {resident_figures()} "
+                   f"(peak {st.session_state.get('peak_figures', 0)})")
+        for name, entry in st.session_state.get("render_stats", {}).items():
+            average = entry["total_ms"] / entry["renders"]
+            st.caption(f"{name}: {entry['last_ms']:.0f} ms last, {average:.0f} ms avg over {entry['renders']}")
@@ -0,0 +1,161 @@
+"""Loan reports for one applicant or a whole applicant file.
+
+In the app the report is only built when the download button is clicked
+(``st.download_button`` with a callable). ``write_bulk`` produces the same
+reports for every row of a CSV/Parquet applicant file, chunk by chunk:
+
+- ``reports.zip``: one ``reports/<applicant_id>.txt`` per applicant (see
+  ``entry_name`` for ids that are not safe file names or repeat);
+- ``summary.csv``: the applicant columns plus the scoring outputs, and the
+  Loan Genie schemes when the file has ``occupation`` and ``age`` columns;
+- ``summary.json``: totals and breakdowns over the whole file.
+
+Everything is written to disk as it is produced, so memory is bounded by
+the chunk size rather than the number of applicants.
+
+    python reports.py applicants.csv reports/ --chunk-size 10000
+"""
+import argparse
+import json
+import re
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+DEFAULT_CHUNK_SIZE = 10_000
+ID_COLUMN = "applicant_id"
+GENIE_COLUMNS = {"occupation", "age", "loan_type", "income", "credit_score"}  # needed for Loan Genie schemes
+
+# (key, label, format) in report order; keys missing from an applicant are skipped
+REPORT_FIELDS = [
+    ("income", "Income", "${}"),
+    ("age", "Age", "{}"),
+    ("credit_score", "Credit Score", "{}"),
+    ("employment_status", "Employment Status", "{}"),
+    ("loan_type", "Loan Type", "{}"),
+    ("loan_term", "Loan Term", "{} Years"),
+    ("loan_amount", "Predicted Loan Amount", "${:,.2f}"),
+    ("approval_chance", "Approval Chance", "{:.1f}%"),
+    ("interest", "Interest Rate", "{:.2f}%"),
+    ("emi", "Monthly EMI", "${:,.2f}"),
+    ("debt_to_income", "Debt-to-Income Ratio", "{:.2f}%"),
+    ("risk_band", "Risk", "{}"),
+    ("dti_verdict", "Affordability", "{}"),
+    ("schemes", "Recommended Schemes", "{}"),
+]
+
+
+def report_text(applicant):
+    """Plain-text report for a dict of applicant fields and scores."""
+    lines = ["Loan Prediction Report:"]
+    for key, label, fmt in REPORT_FIELDS:
+        value = applicant.get(key)
+        if value is None:
+            continue
+        if key == "schemes" and not isinstance(value, str):
+            value = ", ".join(value)
+        lines.append(f"- {label}: {fmt.format(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class Summary:
+    """Running totals over scored chunks, for ``summary.json``."""
+
+    def __init__(self):
+        self.applicants = 0
+        self.total_loan_amount = 0.0
+        self.total_approval_chance = 0.0
+        self.risk_bands = {}
+        self.dti_verdicts = {}
+
+    def add(self, scored):
+        self.applicants += len(scored)
+        self.total_loan_amount += float(scored["loan_amount"].sum())
+        self.total_approval_chance += float(scored["approval_chance"].sum())
+        for counts, column in ((self.risk_bands, "risk_band"), (self.dti_verdicts, "dti_verdict")):
+            for value, n in scored[column].value_counts().items():
+                counts[value] = counts.get(value, 0) + int(n)
+
+    def to_dict(self):
+        n = max(self.applicants, 1)
+        return {
+            "applicants": self.applicants,
+            "total_loan_amount": round(self.total_loan_amount, 2),
+            "mean_loan_amount": round(self.total_loan_amount / n, 2),
+            "mean_approval_chance": round(self.total_approval_chance / n, 2),
+            "risk_bands": self.risk_bands,
+            "dti_verdicts": self.dti_verdicts,
+        }
+
+
+def entry_name(archive, applicant_id, row):
+    """Archive name of an applicant's report: ``reports/<applicant_id>.txt``, made safe.
+
+    Every character of the id other than letters, digits, ``_``, ``.`` and
+    ``-`` becomes ``_``, so no id can add a directory or climb out of
+    ``reports/`` when the archive is extracted. An id whose name is already
+    in ``archive`` (a repeat, or one that sanitizes to the same name) gets
+    ``~<row>`` appended; ``~`` never survives sanitizing, so that name is new.
+    """
+    stem = re.sub(r"[^\w.-]", "_", str(applicant_id)) or "_"
+    name = f"reports/{stem}.txt"
+    if name in archive.NameToInfo:
+        name = f"reports/{stem}~{row}.txt"
+    return name
+
+
+def write_bulk(input_path, output_dir, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write the reports archive and summaries for ``input_path``; returns the summary dict."""
+    import genie
+    from score_cli import ChunkWriter, read_chunks, score_chunk
+
+    catalogue = genie.load()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary = Summary()
+    writer = ChunkWriter(output_dir / "summary.csv")
+    try:
+        with zipfile.ZipFile(output_dir / "reports.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+            for chunk in read_chunks(input_path, chunk_size):
+                scored = score_chunk(chunk)
+                if GENIE_COLUMNS.issubset(scored.columns):
+                    schemes = catalogue.recommend_batch(scored["occupation"], scored["loan_type"], scored["age"],
+                                                        scored["income"], scored["credit_score"])
+                    scored["schemes"] = [", ".join(names) for names in schemes]
+                if ID_COLUMN not in scored:
+                    scored.insert(0, ID_COLUMN, range(summary.applicants, summary.applicants + len(scored)))
+                columns = list(scored.columns)
+                for row, values in enumerate(scored.itertuples(index=False, name=None), start=summary.applicants):
+                    applicant = dict(zip(columns, values))
+                    archive.writestr(entry_name(archive, applicant[ID_COLUMN], row), report_text(applicant))
+                writer.write(scored)
+                summary.add(scored)
+    finally:
+        writer.close()
+
+    result = summary.to_dict()
+    (output_dir / "summary.json").write_text(json.dumps(result, indent=2) + "\n")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate loan reports for a file of applicants.")
+    parser.add_argument("input", help="applicant file (.csv or .parquet)")
+    parser.add_argument("output_dir", help="directory for reports.zip, summary.csv and summary.json")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"applicants per chunk (default {DEFAULT_CHUNK_SIZE:,})")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+
+    start = time.perf_counter()
+    result = write_bulk(args.input, args.output_dir, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {result['applicants']:,} reports in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Headless bulk scoring of applicant files.
+
+Reads a CSV or Parquet file of applicants in fixed-size chunks, scores each
+chunk with the same engine the Loan Predictor tab uses and appends the
+results to the output file as it goes, so memory stays flat however large
+the input is.
+
+    python score_cli.py applicants.csv scored.csv --chunk-size 100000 --workers 4
+"""
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+import scoring
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def is_parquet(path):
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+
+def read_chunks(path, chunk_size):
+    """Yield DataFrames of at most ``chunk_size`` applicants."""
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+@lru_cache(maxsize=None)
+def _score_table(path):
+    import score_table
+
+    return score_table.load(path)
+
+
+def score_chunk(chunk, as_csv=False, table=None):
+    """Input columns followed by the scoring outputs for one chunk.
+
+    With ``as_csv`` the chunk comes back already rendered as CSV text (header
+    included), so the formatting cost is paid in the worker and not in the
+    process doing the writing. ``table`` is the path of a precomputed score
+    table (see ``score_table``) to look the outputs up in; each process maps
+    it once.
+    """
+    scorer = scoring.score if table is None else _score_table(table).score
+    scored = pd.concat([chunk, scorer(chunk)], axis=1)
+    return scored.to_csv(index=False) if as_csv else scored
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = is_parquet(path)
+        self._writer = None
+        self._header = True
+
+    def write(self, frame):
+        """Append a scored DataFrame, or CSV text from ``score_chunk``."""
+        if isinstance(frame, str):
+            with open(self.path, "w" if self._header else "a", newline="") as f:
+                f.write(frame if self._header else frame.split("\n", 1)[1])
+            self._header = False
+        elif self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, table=None):
+    """Score ``input_path`` into ``output_path`` and return the row count.
+
+    With ``workers > 1`` chunks are fanned out to a process pool. At most two
+    chunks per worker are in flight at a time and results are written back
+    in input order.
+    """
+    writer = ChunkWriter(output_path)
+    as_csv = not writer.parquet
+    rows = 0
+    try:
+        if workers <= 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                writer.write(score_chunk(chunk, as_csv, table))
+                rows += len(chunk)
+            return rows
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in read_chunks(input_path, chunk_size):
+                pending.append((len(chunk), pool.submit(score_chunk, chunk, as_csv, table)))
+                if len(pending) >= workers * 2:
+                    size, future = pending.popleft()
+                    writer.write(future.result())
+                    rows += size
+            while pending:
+                size, future = pending.popleft()
+                writer.write(future.result())
+                rows += size
+        return rows
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of loan applicants.")
+    parser.add_argument("input", help="applicant file (.csv or .parquet)")
+    parser.add_argument("output", help="where to write the scored rows (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"rows per chunk (default {DEFAULT_CHUNK_SIZE:,})")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes (default 1)")
+    parser.add_argument("--table", help="look scores up in this precomputed table (python score_table.py build)")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, args.chunk_size, args.workers, args.table)
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed > 0 else float("inf")
+    print(f"Scored {rows:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Loan scoring engine shared by the Loan Predictor tab and offline tools.
+
+Everything here is plain NumPy so it can be imported without Streamlit and
+applied to a single applicant or to millions of rows in one pass.
+"""
+import numpy as np
+
+# ----- Model Constants -----
+EMPLOYMENT_MAP = {"Employed": 1, "Self-Employed": 0.8, "Unemployed": 0.5}
+
+LOAN_TYPE_MAP = {
+    "Home Loan": 1.2,
+    "Car Loan": 0.8,
+    "Education Loan": 0.9,
+    "Personal Loan": 0.7
+}
+
+LOAN_TERMS = [5, 10, 15, 20, 25, 30]
+MAX_CREDIT_SCORE = 850
+DEFAULT_INTEREST = 8.0  # % per year, same default as the Decision Simulator
+
+# Risk Meter bands: > 750 is low risk, 600-750 moderate, <= 600 high
+LOW_RISK_SCORE = 750
+HIGH_RISK_SCORE = 600
+
+# Loan Impact Analysis verdicts on the debt-to-income ratio (%)
+COMFORTABLE_DTI = 30
+HIGH_DTI = 50
+
+APPLICANT_COLUMNS = ["income", "credit_score", "employment_status", "loan_type", "loan_term", "interest"]
+SCORE_COLUMNS = ["loan_amount", "approval_chance", "emi", "debt_to_income", "risk_band", "dti_verdict"]
+
+
+# ----- Formulas -----
+def loan_amount(income, credit_score, employment_factor, loan_type_factor, loan_term):
+    """Eligible loan amount; every argument may be a scalar or an array."""
+    return (income * 10) * (credit_score / MAX_CREDIT_SCORE) * employment_factor * loan_type_factor / (loan_term / 10)
+
+
+def approval_chance(credit_score):
+    """Approval probability in percent."""
+    return (credit_score / MAX_CREDIT_SCORE) * 100
+
+
+def emi(principal, annual_rate, n_payments):
+    """Amortized monthly instalment for an annual rate given in percent.
+
+    A zero rate falls back to straight-line repayment instead of dividing by
+    zero. Scalars in give a float back, arrays broadcast against each other.
+    """
+    principal = np.asarray(principal, dtype=float)
+    r = np.asarray(annual_rate, dtype=float) / (12 * 100)
+    n = np.asarray(n_payments, dtype=float)
+
+    growth = np.power(1 + r, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amortized = principal * r * growth / (growth - 1)
+    result = np.where(r == 0, principal / n, amortized)
+    return result.item() if result.ndim == 0 else result
+
+
+def debt_to_income(monthly_emi, income):
+    """Debt-to-income ratio in percent."""
+    return (monthly_emi / income) * 100
+
+
+def risk_band(credit_score):
+    """"Low", "Moderate" or "High" risk for a credit score (or array of them)."""
+    credit_score = np.asarray(credit_score)
+    band = np.select(
+        [credit_score > LOW_RISK_SCORE, credit_score > HIGH_RISK_SCORE],
+        ["Low", "Moderate"],
+        "High",
+    )
+    return band.item() if band.ndim == 0 else band
+
+
+def dti_verdict(ratio):
+    """"Comfortable", "Stretched" or "High Risk" for a debt-to-income ratio."""
+    ratio = np.asarray(ratio)
+    verdict = np.select(
+        [ratio < COMFORTABLE_DTI, ratio < HIGH_DTI],
+        ["Comfortable", "Stretched"],
+        "High Risk",
+    )
+    return verdict.item() if verdict.ndim == 0 else verdict
+
+
+# ----- Batch API -----
+def factor(values, mapping, name):
+    """Translate category labels (or ready-made factors) into a float array."""
+    values = np.asarray(values)
+    if values.dtype.kind in "iuf":
+        return values.astype(float)
+
+    out = np.empty(values.shape, dtype=float)
+    matched = np.zeros(values.shape, dtype=bool)
+    for label, value in mapping.items():
+        mask = values == label
+        out[mask] = value
+        matched |= mask
+    if not matched.all():
+        unknown = values[~matched][0]
+        raise ValueError(f"Unknown {name}: {unknown!r}")
+    return out
+
+
+def score(applicants):
+    """Score a batch of applicants in one vectorized pass.
+
+    ``applicants`` is a DataFrame, a NumPy structured array or a mapping of
+    column name to array holding the ``APPLICANT_COLUMNS`` (``interest`` is
+    optional and defaults to ``DEFAULT_INTEREST``). A DataFrame in gives a
+    DataFrame of ``SCORE_COLUMNS`` back on the same index, anything else gives
+    a dict of arrays.
+    """
+    dtype_names = getattr(getattr(applicants, "dtype", None), "names", None)
+    columns = set(dtype_names) if dtype_names else set(applicants)
+    missing = [c for c in APPLICANT_COLUMNS[:-1] if c not in columns]
+    if missing:
+        raise KeyError(f"Missing applicant columns: {', '.join(missing)}")
+
+    income = np.asarray(applicants["income"], dtype=float)
+    credit_score = np.asarray(applicants["credit_score"], dtype=float)
+    loan_term = np.asarray(applicants["loan_term"], dtype=float)
+    if "interest" in columns:
+        interest = np.asarray(applicants["interest"], dtype=float)
+    else:
+        interest = np.full(income.shape, DEFAULT_INTEREST)
+
+    employment_factor = factor(applicants["employment_status"], EMPLOYMENT_MAP, "employment_status")
+    loan_type_factor = factor(applicants["loan_type"], LOAN_TYPE_MAP, "loan_type")
+
+    amount = loan_amount(income, credit_score, employment_factor, loan_type_factor, loan_term)
+    monthly_emi = emi(amount, interest, loan_term * 12)
+    ratio = debt_to_income(monthly_emi, income)
+    result = {
+        "loan_amount": amount,
+        "approval_chance": approval_chance(credit_score),
+        "emi": monthly_emi,
+        "debt_to_income": ratio,
+        "risk_band": risk_band(credit_score),
+        "dti_verdict": dti_verdict(ratio),
+    }
+
+    if hasattr(applicants, "index") and hasattr(applicants, "columns"):
+        import pandas as pd
+        return pd.DataFrame(result, index=applicants.index)
+    return result
@@ -0,0 +1,43 @@
+"""Affordability surface for the Decision Simulator.
+
+The debt-to-income ratio over a grid of loan amounts, terms and rates is
+computed as one broadcast array. Because the EMI is linear in the loan
+amount, the grid only needs the EMI of one dollar per (term, rate) cell;
+every amount is a multiple of it. The same fact makes "largest affordable
+loan" a division instead of a search.
+"""
+import numpy as np
+
+import scoring
+
+AMOUNTS = np.arange(1000, 200001, 1000)          # $1k - $200k, as the simulator slider
+TERMS = np.arange(1, 31)                         # 1 - 30 years
+RATES = np.round(np.arange(5.0, 15.01, 0.1), 1)  # 5% - 15% a year
+
+
+def emi_per_dollar(terms=TERMS, rates=RATES):
+    """EMI of a $1 loan, shaped (len(terms), len(rates))."""
+    return scoring.emi(1.0, np.asarray(rates)[None, :], np.asarray(terms)[:, None] * 12)
+
+
+def dti_surface(income, amounts=AMOUNTS, terms=TERMS, rates=RATES):
+    """Debt-to-income ratio (%) shaped (len(amounts), len(terms), len(rates))."""
+    unit = emi_per_dollar(terms, rates)
+    return np.asarray(amounts, dtype=float)[:, None, None] * unit[None, :, :] * (100 / income)
+
+
+def max_affordable_loan(income, terms, rates, max_dti=scoring.COMFORTABLE_DTI):
+    """Largest whole-dollar loan keeping the debt-to-income ratio below ``max_dti`` (%).
+
+    Below, not at: ``scoring.dti_verdict`` puts a ratio of exactly
+    ``max_dti`` in the next band. ``terms`` (years) and ``rates`` (% a year)
+    broadcast against each other.
+    """
+    rates, n_payments = np.asarray(rates), np.asarray(terms) * 12
+    amount = np.ceil(income * max_dti / 100 / scoring.emi(1.0, rates, n_payments)) - 1
+    # Rounding can leave a loan right at the boundary a hair over it
+    return amount - (scoring.debt_to_income(scoring.emi(amount, rates, n_payments), income) >= max_dti)
+
+
+def nearest_rate_index(rate, rates=RATES):
+    return int(np.abs(np.asarray(rates) - rate).argmin())
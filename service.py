@@ -0,0 +1,266 @@
+"""HTTP/JSON scoring service: the Loan Predictor and Decision Simulator math.
+
+A plain ASGI application (no web framework), so any ASGI server can run
+it; ``python service.py`` serves it with uvicorn if that is installed.
+
+    POST /score           one applicant -> loan amount, approval chance, EMI, DTI, risk band, verdict
+    POST /score/batch     {"applicants": [...]} -> {"results": [...]}, scored in one vectorized call
+    POST /simulate        {"loan_amount", "income", "loan_term", "interest"} -> EMI, DTI, net savings,
+                          verdict and the largest comfortable/stretched loan
+    GET  /health
+
+Concurrent single requests are micro-batched. Every request that reaches
+the handler in the same event-loop iteration joins one batch (up to
+``MAX_BATCH``), and the batch is answered with one call to
+``scoring.score`` (or the simulator math). A lone request is not delayed.
+Under load, batches grow by themselves while the previous batch is being
+computed. ``LOAN_SERVICE_BATCH_WINDOW_MS`` > 0 also makes the first
+request of a batch wait that long for company; ``--max-batch 1`` turns
+batching off. Requests are validated before they join a batch, so one bad
+request cannot fail the others. Every number must lie in its ``RANGES``
+entry; a result that still is not a finite number is answered with 422
+rather than sent as ``NaN``/``Infinity``, which is not JSON.
+
+    python service.py --port 8000
+    curl -d '{"income": 5000, "credit_score": 720, "employment_status": "Employed",
+              "loan_type": "Home Loan", "loan_term": 20}' localhost:8000/score
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+
+import scoring
+import sensitivity
+
+BATCH_WINDOW_MS = float(os.environ.get("LOAN_SERVICE_BATCH_WINDOW_MS", "0"))
+MAX_BATCH = 256
+MAX_BODY = 1 << 20  # bytes
+
+ROUTES = {"/health": "GET", "/score": "POST", "/score/batch": "POST", "/simulate": "POST"}
+SIMULATOR_FIELDS = ["loan_amount", "income", "loan_term", "interest"]
+# Accepted (lowest, highest) of every number: wider than the app's sliders,
+# narrow enough that no formula overflows
+RANGES = {
+    "income": (1, 10_000_000),  # $ a month
+    "credit_score": (300, scoring.MAX_CREDIT_SCORE),
+    "loan_term": (1, 50),  # years
+    "interest": (0, 100),  # % a year
+    "loan_amount": (0, 1_000_000_000),
+}
+_CATEGORIES = {"employment_status": scoring.EMPLOYMENT_MAP, "loan_type": scoring.LOAN_TYPE_MAP}
+
+
+class BadRequest(Exception):
+    pass
+
+
+# ----- Validation -----
+def _number(payload, name, default=None):
+    value = payload.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise BadRequest(f"'{name}' must be a number")
+    low, high = RANGES[name]
+    # Also false for NaN; infinities and huge integers fall outside the range
+    if not low <= value <= high:
+        raise BadRequest(f"'{name}' must be between {low:,} and {high:,}")
+    return value
+
+
+def applicant(payload):
+    """The ``scoring.APPLICANT_COLUMNS`` of one request body, checked."""
+    if not isinstance(payload, dict):
+        raise BadRequest("expected a JSON object")
+    row = {name: _number(payload, name) for name in ("income", "credit_score", "loan_term")}
+    row["interest"] = _number(payload, "interest", scoring.DEFAULT_INTEREST)
+    for name, mapping in _CATEGORIES.items():
+        if payload.get(name) not in mapping:
+            raise BadRequest(f"'{name}' must be one of {', '.join(mapping)}")
+        row[name] = payload[name]
+    return row
+
+
+def simulation(payload):
+    if not isinstance(payload, dict):
+        raise BadRequest("expected a JSON object")
+    row = {name: _number(payload, name, scoring.DEFAULT_INTEREST if name == "interest" else None)
+           for name in SIMULATOR_FIELDS}
+    return row
+
+
+# ----- Vectorized handlers -----
+def _columns(rows, names):
+    return {name: np.array([row[name] for row in rows]) for name in names}
+
+
+def score_rows(rows):
+    """``scoring.score`` over a list of validated applicants, one result dict each."""
+    scores = scoring.score(_columns(rows, scoring.APPLICANT_COLUMNS))
+    columns = [scores[name].tolist() for name in scoring.SCORE_COLUMNS]
+    return [dict(zip(scoring.SCORE_COLUMNS, values)) for values in zip(*columns)]
+
+
+def simulate_rows(rows):
+    """The Decision Simulator's numbers for a list of validated requests."""
+    c = _columns(rows, SIMULATOR_FIELDS)
+    n_payments = c["loan_term"] * 12
+    emi = scoring.emi(c["loan_amount"], c["interest"], n_payments)
+    ratio = scoring.debt_to_income(emi, c["income"])
+    result = {
+        "emi": emi,
+        "debt_to_income": ratio,
+        "net_savings": (c["income"] - emi) * n_payments,
+        "dti_verdict": scoring.dti_verdict(ratio),
+        "max_comfortable_loan": sensitivity.max_affordable_loan(c["income"], c["loan_term"], c["interest"],
+                                                                scoring.COMFORTABLE_DTI),
+        "max_stretched_loan": sensitivity.max_affordable_loan(c["income"], c["loan_term"], c["interest"],
+                                                              scoring.HIGH_DTI),
+    }
+    columns = [np.asarray(values).tolist() for values in result.values()]
+    return [dict(zip(result, values)) for values in zip(*columns)]
+
+
+class MicroBatcher:
+    """Collects concurrent requests and answers them with one vectorized call."""
+
+    def __init__(self, handler, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._rows = []
+        self._futures = []
+        self._timer = None
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, row):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._rows.append(row)
+        self._futures.append(future)
+        if len(self._rows) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            if self.window > 0:
+                self._timer = loop.call_later(self.window, self._flush)
+            else:
+                self._timer = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows, futures = self._rows, self._futures
+        self._rows, self._futures = [], []
+        if not rows:
+            return
+        self.batches += 1
+        self.requests += len(rows)
+        try:
+            results = self.handler(rows)
+        except Exception as e:  # answer every waiting request rather than leaving it hanging
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.cancelled():
+                future.set_result(result)
+
+
+# ----- ASGI -----
+class ScoringService:
+    """The ASGI application."""
+
+    def __init__(self, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+        self.scorer = MicroBatcher(score_rows, window_ms, max_batch)
+        self.simulator = MicroBatcher(simulate_rows, window_ms, max_batch)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        try:
+            status, body = await self.route(scope["method"], scope["path"], receive)
+        except BadRequest as e:
+            status, body = 400, {"error": str(e)}
+        try:
+            payload = json.dumps(body, allow_nan=False).encode()
+        except ValueError:
+            status, payload = 422, json.dumps({"error": "the result is not a finite number"}).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(payload)).encode())]})
+        await send({"type": "http.response.body", "body": payload})
+
+    async def route(self, method, path, receive):
+        expected = ROUTES.get(path)
+        if expected is None:
+            return 404, {"error": "not found"}
+        if method != expected:
+            return 405, {"error": f"use {expected} {path}"}
+        if path == "/health":
+            return 200, {"status": "ok", "batches": self.scorer.batches + self.simulator.batches,
+                         "requests": self.scorer.requests + self.simulator.requests}
+        if path == "/score":
+            return 200, await self.scorer.submit(applicant(await _read_json(receive)))
+        if path == "/simulate":
+            return 200, await self.simulator.submit(simulation(await _read_json(receive)))
+        if path == "/score/batch":
+            payload = await _read_json(receive)
+            applicants = payload.get("applicants") if isinstance(payload, dict) else None
+            if not isinstance(applicants, list) or not applicants:
+                raise BadRequest("expected {\"applicants\": [...]}")
+            return 200, {"results": score_rows([applicant(row) for row in applicants])}
+
+
+async def _read_json(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY:
+            raise BadRequest("request body too large")
+        if not message.get("more_body"):
+            break
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise BadRequest("body is not valid JSON") from None
+
+
+app = ScoringService()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the loan scoring API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS,
+                        help="extra wait for a batch to fill (default: batch within one event-loop iteration)")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="1 turns micro-batching off")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("python service.py needs uvicorn (pip install uvicorn); "
+              "or run service:app with any ASGI server", file=sys.stderr)
+        return 1
+    uvicorn.run(ScoringService(args.window_ms, args.max_batch), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
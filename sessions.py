@@ -0,0 +1,150 @@
+"""Server-side stores for Financial Journey Game sessions.
+
+A browser session only keeps a game id in ``st.session_state``. The game
+itself (a ``game_engine.GameState``) lives in one store shared by every
+session of the server process:
+
+- ``MemoryStore``: a bounded LRU dict. The least recently used games are
+  evicted once it is full, and optionally spilled to a backing store instead
+  of being dropped;
+- ``SQLiteStore``: games kept as compact blobs in a SQLite file on local disk.
+
+``open_store`` builds one from a spec string such as ``"memory"``,
+``"sqlite:sessions.db"`` or ``"memory+sqlite:sessions.db"`` (the
+``LOAN_SESSION_STORE`` environment variable in the app).
+
+All stores are thread-safe: Streamlit runs every session in its own thread.
+"""
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+import game_engine
+
+DEFAULT_MAX_SESSIONS = 10_000
+DEFAULT_DB_PATH = "sessions.db"
+
+
+class MemoryStore:
+    """In-process LRU of live games.
+
+    ``get`` hands back the stored object itself, so a game mutated in place
+    is already up to date; ``put`` is still needed for new games and to mark
+    a game as recently used.
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, backing=None):
+        self.max_sessions = max_sessions
+        self.backing = backing
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, game_id):
+        with self._lock:
+            state = self._games.get(game_id)
+            if state is not None:
+                self._games.move_to_end(game_id)
+                return state
+        if self.backing is None:
+            return None
+        state = self.backing.get(game_id)
+        if state is not None:
+            self.put(game_id, state)
+        return state
+
+    def put(self, game_id, state):
+        evicted = []
+        with self._lock:
+            self._games[game_id] = state
+            self._games.move_to_end(game_id)
+            while len(self._games) > self.max_sessions:
+                evicted.append(self._games.popitem(last=False))
+                self.evictions += 1
+        if self.backing is not None:
+            for old_id, old_state in evicted:
+                self.backing.put(old_id, old_state)
+
+    def delete(self, game_id):
+        with self._lock:
+            self._games.pop(game_id, None)
+        if self.backing is not None:
+            self.backing.delete(game_id)
+
+    def __len__(self):
+        return len(self._games)
+
+
+class SQLiteStore:
+    """Games persisted as ``GameState.to_bytes`` blobs in a SQLite file.
+
+    Blobs saved under other rules (or by an older version) read as missing,
+    like an evicted game.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, rules=None):
+        self.path = path
+        self.rules = rules
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            " game_id TEXT PRIMARY KEY,"
+            " state BLOB NOT NULL,"
+            " finished INTEGER NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+
+    def get(self, game_id):
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM games WHERE game_id = ?", (game_id,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return game_engine.GameState.from_bytes(row[0], self.rules)
+        except (ValueError, struct.error):
+            return None
+
+    def put(self, game_id, state):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO games (game_id, state, finished, updated) VALUES (?, ?, ?, ?)",
+                (game_id, state.to_bytes(), int(state.finished), time.time()),
+            )
+
+    def delete(self, game_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+
+    def purge(self, older_than):
+        """Drop games not touched for ``older_than`` seconds; returns how many."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM games WHERE updated < ?", (time.time() - older_than,))
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def open_store(spec="memory", max_sessions=DEFAULT_MAX_SESSIONS, rules=None):
+    """Build a store from ``"memory"``, ``"sqlite[:path]"`` or ``"memory+sqlite[:path]"``.
+
+    ``rules`` are the ``game_engine.Rules`` the stored games play by (default: classic).
+    """
+    kind, _, path = spec.partition(":")
+    path = path or DEFAULT_DB_PATH
+    if kind == "memory":
+        return MemoryStore(max_sessions)
+    if kind == "sqlite":
+        return SQLiteStore(path, rules)
+    if kind == "memory+sqlite":
+        return MemoryStore(max_sessions, backing=SQLiteStore(path, rules))
+    raise ValueError(f"Unknown session store: {spec!r}")
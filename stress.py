@@ -0,0 +1,226 @@
+"""Stress test of a loan book under the game's market events.
+
+The market events of the Financial Journey Game (``game.MARKET_EVENTS``)
+also carry an income shock and a rate shock. A stress run draws
+``n_paths`` market paths, one event per month, and plays every loan of the
+book through every path:
+
+- the borrower's monthly income is multiplied by ``1 + income_impact``
+  each month;
+- the loan is floating-rate: its rate moves by ``rate_impact`` points (never
+  below zero), and the EMI is reset every month to repay the outstanding
+  balance over the remaining term.
+
+The report is, for every month, the share of the book whose debt-to-income
+ratio is at or above ``scoring.COMFORTABLE_DTI`` (30%) and
+``scoring.HIGH_DTI`` (50%): the mean over the paths and the 95th percentile
+path. "At or above" as in ``scoring.dti_verdict``, so a share counts the
+loans the app would call Stretched or worse (High Risk). Loans already
+repaid count as below both thresholds.
+
+The book is a CSV/Parquet file with the ``BOOK_COLUMNS`` (amount, annual
+rate in percent, term in years, monthly income). It is read in chunks and
+each chunk is simulated as ``(paths, loans)`` arrays, optionally in a
+process pool. Only per-(path, month) counts come back, so memory is bounded
+by the chunk size whatever the size of the book.
+
+    python stress.py synthesize book.csv --loans 1000000
+    python stress.py run book.csv --paths 50 --months 36 --workers 4 --output stress.csv
+"""
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import game
+import game_sim
+import scoring
+import sensitivity
+
+BOOK_COLUMNS = ["loan_amount", "interest", "loan_term", "income"]
+THRESHOLDS = (scoring.COMFORTABLE_DTI, scoring.HIGH_DTI)
+DEFAULT_PATHS = 50
+DEFAULT_MONTHS = 36
+DEFAULT_CHUNK_SIZE = 20_000
+BLOCK_LOANS = 4_096  # loans simulated together; keeps the (paths, loans) arrays in cache
+TAIL_PERCENTILE = 95
+
+# A named scenario repeats one event every month; "monte-carlo" draws them
+SCENARIOS = {name.split(" ", 1)[1].lower().replace(" ", "-"): code for code, name in enumerate(game.EVENT_NAMES)}
+
+
+def market_paths(n_paths, months, seed=None, scenario="monte-carlo"):
+    """Income multiplier and rate shift (points) of every path, each ``(n_paths, months)``.
+
+    Both apply to the month they are indexed by: month 0 is already shocked.
+    """
+    if scenario == "monte-carlo":
+        events = game_sim.draw_events(np.random.default_rng(seed), n_paths, months).T
+    else:
+        events = np.full((n_paths, months), SCENARIOS[scenario], dtype=np.int8)
+    income = np.cumprod(1 + game.INCOME_IMPACTS[events], axis=1)
+    rate_shift = np.cumsum(game.RATE_IMPACTS[events], axis=1)
+    return income, rate_shift
+
+
+def stress_loans(amount, rate, term, income, income_paths, rate_paths, thresholds=THRESHOLDS):
+    """Loans at or above each DTI threshold, per (threshold, path, month), for one chunk of loans.
+
+    ``amount``, ``rate`` (% a year), ``term`` (years) and ``income`` (a month)
+    are arrays with one entry per loan; the paths come from ``market_paths``.
+    """
+    amount, rate, income = (np.asarray(x, dtype=float) for x in (amount, rate, income))
+    n_payments = np.asarray(term) * 12
+    counts = np.zeros((len(thresholds), *income_paths.shape), dtype=np.int64)
+    for start in range(0, len(amount), BLOCK_LOANS):
+        block = slice(start, start + BLOCK_LOANS)
+        counts += _stress_block(amount[block], rate[block], n_payments[block], income[block],
+                                income_paths, rate_paths, thresholds)
+    return counts
+
+
+def _stress_block(amount, rate, n_payments, income, income_paths, rate_paths, thresholds):
+    n_paths, months = income_paths.shape
+    balance = np.broadcast_to(amount, (n_paths, len(amount))).copy()
+    limits = np.asarray(thresholds, dtype=float)[:, None] / 100 * income  # EMI at each threshold, per loan
+    counts = np.zeros((len(thresholds), n_paths, months), dtype=np.int64)
+
+    emi = np.zeros((n_paths, len(amount)))
+    r = np.zeros((n_paths, len(amount)))
+    for month in range(months):
+        remaining = n_payments - month
+        active = remaining > 0
+        if not active.any():
+            break
+        # The EMI is reset on the outstanding balance at this month's rate.
+        # At an unchanged rate the reset gives the same EMI, so only the
+        # paths whose rate moved are recomputed.
+        moved = np.flatnonzero(rate_paths[:, month] != (rate_paths[:, month - 1] if month else np.nan))
+        if len(moved):
+            r[moved] = np.maximum(rate + rate_paths[moved, month, None], 0) / 1200
+            n = np.maximum(remaining, 1)
+            growth = np.power(1 + r[moved], n)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                per_dollar = np.where(r[moved] > 0, r[moved] * growth / (growth - 1), 1 / n)
+            emi[moved] = balance[moved] * per_dollar
+        emi[:, ~active] = 0.0
+
+        # DTI at or above the threshold <=> EMI at or above the threshold's share of the shocked income
+        shocked = income_paths[:, month, None]
+        for i, limit in enumerate(limits):
+            counts[i, :, month] = (emi >= limit * shocked).sum(axis=1)
+        # Interest accrues, then the payment comes off
+        balance *= 1 + r
+        balance -= emi
+    return counts
+
+
+def _stress_chunk(chunk, income_paths, rate_paths):
+    return stress_loans(chunk["loan_amount"].to_numpy(), chunk["interest"].to_numpy(),
+                        chunk["loan_term"].to_numpy(), chunk["income"].to_numpy(), income_paths, rate_paths)
+
+
+def run(book_path, n_paths=DEFAULT_PATHS, months=DEFAULT_MONTHS, seed=None, scenario="monte-carlo",
+        chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """Stress the loan book at ``book_path``; returns a DataFrame with one row per month.
+
+    With ``workers > 1`` chunks go to a process pool, at most two per worker
+    in flight, the way ``score_cli.score_file`` fans them out.
+    """
+    import pandas as pd
+    from score_cli import read_chunks
+
+    if scenario != "monte-carlo":
+        n_paths = 1  # every path would be the same
+    income_paths, rate_paths = market_paths(n_paths, months, seed, scenario)
+    counts = np.zeros((len(THRESHOLDS), n_paths, months), dtype=np.int64)
+    loans = 0
+
+    chunks = read_chunks(book_path, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            counts += _stress_chunk(chunk, income_paths, rate_paths)
+            loans += len(chunk)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_stress_chunk, chunk[BOOK_COLUMNS], income_paths, rate_paths))
+                loans += len(chunk)
+                if len(pending) >= workers * 2:
+                    counts += pending.popleft().result()
+            while pending:
+                counts += pending.popleft().result()
+
+    shares = counts / max(loans, 1) * 100
+    report = pd.DataFrame({"month": np.arange(1, months + 1)})
+    for threshold, share in zip(THRESHOLDS, shares):
+        report[f"above_{threshold}_mean"] = share.mean(axis=0)
+        report[f"above_{threshold}_p{TAIL_PERCENTILE}"] = np.percentile(share, TAIL_PERCENTILE, axis=0)
+    report.attrs["loans"] = loans
+    return report
+
+
+def synthesize_book(loans, seed=0):
+    """A made-up loan book with a realistic spread of starting DTIs; not real lending data."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    income = rng.integers(1000, 20001, loans)
+    term = rng.choice(scoring.LOAN_TERMS, loans)
+    rate = np.round(rng.uniform(6, 14, loans), 2)
+    starting_dti = rng.uniform(5, 45, loans)
+    amount = np.round(sensitivity.max_affordable_loan(income, term, rate, starting_dti), -2)
+    return pd.DataFrame({"loan_amount": amount, "interest": rate, "loan_term": term, "income": income})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress-test a loan book under the game's market events.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = commands.add_parser("run", help="stress a loan book")
+    run_cmd.add_argument("book", help=f"loan book (.csv or .parquet) with {', '.join(BOOK_COLUMNS)}")
+    run_cmd.add_argument("--paths", type=int, default=DEFAULT_PATHS, help="market paths (default %(default)s)")
+    run_cmd.add_argument("--months", type=int, default=DEFAULT_MONTHS, help="horizon (default %(default)s)")
+    run_cmd.add_argument("--scenario", choices=["monte-carlo", *SCENARIOS], default="monte-carlo")
+    run_cmd.add_argument("--seed", type=int, default=None)
+    run_cmd.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    run_cmd.add_argument("--workers", type=int, default=1, help="processes (default 1)")
+    run_cmd.add_argument("--output", help="write the month-by-month shares to this CSV")
+
+    synth_cmd = commands.add_parser("synthesize", help="write a made-up loan book for demos")
+    synth_cmd.add_argument("output")
+    synth_cmd.add_argument("--loans", type=int, default=1_000_000)
+    synth_cmd.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "synthesize":
+        synthesize_book(args.loans, args.seed).to_csv(args.output, index=False)
+        print(f"Wrote {args.loans:,} loans to {args.output}", file=sys.stderr)
+        return 0
+
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+
+    start = time.perf_counter()
+    report = run(args.book, args.paths, args.months, args.seed, args.scenario, args.chunk_size, args.workers)
+    elapsed = time.perf_counter() - start
+    if args.output:
+        report.to_csv(args.output, index=False)
+
+    low, high = THRESHOLDS
+    print(f"Stressed {report.attrs['loans']:,} loans over {args.months} months ({args.scenario}) "
+          f"in {elapsed:.2f}s", file=sys.stderr)
+    print(f"{'month':>5} {f'>{low}% mean':>11} {f'>{low}% p{TAIL_PERCENTILE}':>11} "
+          f"{f'>{high}% mean':>11} {f'>{high}% p{TAIL_PERCENTILE}':>11}")
+    step = max(1, args.months // 12)
+    for row in report.iloc[step - 1::step].itertuples(index=False):
+        print(f"{row[0]:5} {row[1]:10.2f}% {row[2]:10.2f}% {row[3]:10.2f}% {row[4]:10.2f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())